@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
-from PIL import Image
 import os
+from images import thumbnail
+from regression import warm_up
+from utils import search_all
 
 st.set_page_config(
     page_title="无人机数字化资源平台",
@@ -10,6 +12,9 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# 服务启动后在后台预加载统计分析页的回归后端
+warm_up()
+
 st.title("🚁 无人机数字化资源平台")
 
 st.markdown("""
@@ -20,8 +25,24 @@ st.markdown("""
 # Load Hero Image
 hero_path = os.path.join(os.path.dirname(__file__), "assets/hero.jpg")
 if os.path.exists(hero_path):
-    image = Image.open(hero_path)
-    st.image(image, use_container_width=True)
+    st.image(thumbnail(hero_path, "hero"), use_container_width=True)
+
+# 全文检索：机型、子系统与案例
+SEARCH_PAGES = {
+    "model": ("✈️", "pages/1_✈️_机型库.py", "机型库"),
+    "subsystem": ("🔧", "pages/2_🔧_子系统库.py", "子系统库"),
+    "case": ("📖", "pages/3_📖_案例库.py", "案例库"),
+}
+query = st.text_input("🔍 搜索机型、子系统和案例", placeholder="输入名称、厂商、用途或关键词，如：全球鹰、察打一体")
+if query.strip():
+    hits = search_all(query)
+    if hits:
+        st.caption(f"找到 {len(hits)} 条相关结果")
+        for hit in hits:
+            icon, page, page_name = SEARCH_PAGES[hit["kind"]]
+            st.page_link(page, label=f"{hit['title']} · {page_name}", icon=icon)
+    else:
+        st.info("没有找到相关结果。")
 
 col1, col2, col3 = st.columns(3)
 
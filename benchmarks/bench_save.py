@@ -0,0 +1,116 @@
+"""Benchmark save_data serialization: the original clean_nan + indented json.dump vs storage.JsonStore.
+
+Usage: python benchmarks/bench_save.py [--rows 50000] [--repeat 3]
+
+Builds a synthetic UAV catalog with missing cells and nested custom_params,
+saves it with the original code path and with the current one (stdlib json
+and, if installed, orjson), and checks that every file loads back to the
+same records.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+
+
+def make_catalog(rows, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def numeric(missing=0.2):
+        values = rng.uniform(0.1, 1000.0, rows).round(2)
+        values[rng.random(rows) < missing] = np.nan
+        return values
+
+    custom = [{"续航里程": float(rng.uniform(1, 50)), "备注": None if i % 3 else float("nan")}
+              if i % 4 else {} for i in range(rows)]
+    return pd.DataFrame({
+        "id": [f"uav-{i}" for i in range(rows)],
+        "name": [f"型号-{i}" for i in range(rows)],
+        "manufacturer": rng.choice(["大疆", "Acme", "航天彩虹", None], rows),
+        "type": rng.choice(["Fixed-Wing", "Multi-Rotor", "VTOL", "Helicopter", "Other"], rows),
+        "image_url": [None if i % 5 else f"uav-{i}.png" for i in range(rows)],
+        "description": ["一款用于测绘与巡检的无人机，具备长航时和高可靠性。" * 2] * rows,
+        "length_m": numeric(), "wingspan_m": numeric(), "height_m": numeric(),
+        "mtow_kg": numeric(0.05), "empty_weight_kg": numeric(), "max_payload_kg": numeric(),
+        "max_speed_kmh": numeric(), "cruise_speed_kmh": numeric(), "range_km": numeric(),
+        "endurance_min": numeric(), "ceiling_m": numeric(),
+        "purpose": [["侦察", "测绘"] if i % 2 else ["巡检"] for i in range(rows)],
+        "custom_params": custom,
+    })
+
+
+def save_original(path, df):
+    """save_data as it was before the storage backends (per-cell recursive clean_nan)."""
+    data = df.to_dict(orient="records")
+
+    def clean_nan(obj):
+        if isinstance(obj, dict):
+            return {k: clean_nan(v) for k, v in obj.items()}
+        elif isinstance(obj, list):
+            return [clean_nan(item) for item in obj]
+        elif isinstance(obj, float) and (pd.isna(obj) or obj != obj):
+            return None
+        else:
+            return obj
+
+    data = clean_nan(data)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def save_current(data_dir, df):
+    storage.JsonStore(data_dir).save("uav_models.json", df)
+
+
+def best_of(repeat, func, *args):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_catalog(args.rows)
+    encoders = [("stdlib json", None)]
+    if storage.orjson is not None:
+        encoders.append(("orjson", storage.orjson))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        original_path = os.path.join(tmp, "original.json")
+        baseline = best_of(args.repeat, save_original, original_path, df)
+        with open(original_path, encoding="utf-8") as f:
+            expected = json.load(f)
+        print(f"{args.rows} rows, best of {args.repeat}")
+        print(f"  original (clean_nan + indent=2): {baseline:.2f} s")
+
+        installed = storage.orjson
+        try:
+            for label, encoder in encoders:
+                storage.orjson = encoder
+                elapsed = best_of(args.repeat, save_current, tmp, df)
+                with open(os.path.join(tmp, "uav_models.json"), encoding="utf-8") as f:
+                    same = json.load(f) == expected
+                print(f"  JsonStore ({label}): {elapsed:.2f} s  "
+                      f"{baseline / elapsed:.1f}x  {'same records' if same else 'RECORDS DIFFER'}")
+        finally:
+            storage.orjson = installed
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,922 @@
+"""AI extraction of UAV model data from case Markdown, single and in batches."""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils import load_data, insert_record, allocate_ids, read_case_file
+
+# AI服务端点配置（均为 OpenAI 兼容的 chat-completions 接口）
+PROVIDERS = {
+    "DeepSeek": {"base_url": "https://api.deepseek.com"},
+    "OpenAI": {"base_url": "https://api.openai.com/v1"},
+    "通义千问": {"base_url": "https://dashscope.aliyuncs.com/compatible-mode/v1"},
+}
+
+# 各服务的请求速率上限（次/分钟）
+PROVIDER_RATE_LIMITS = {"DeepSeek": 120, "OpenAI": 500, "通义千问": 60}
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1.0
+# 单次重试最长等待（秒）；服务端要求的 Retry-After 超过它时直接放弃
+RETRY_MAX_DELAY = 60.0
+
+# 提取请求的采样参数，同时计入结果缓存的键
+CHAT_TEMPERATURE = 0.3
+CHAT_MAX_TOKENS = 2000
+
+SYSTEM_PROMPT = "你是一个专业的无人机数据提取助手，请严格按照JSON格式返回提取的机型信息。"
+
+PROMPT_TEMPLATE = """
+请从以下无人机案例Markdown内容中提取机型信息，并严格按照JSON格式返回。如果某项信息在内容中未提及，请设置为null或0。
+
+返回的JSON结构必须如下（不要添加任何额外文字）:
+{{
+    "name": "型号名称",
+    "manufacturer": "厂商名称",
+    "type": "Fixed-Wing/Multi-Rotor/VTOL/Helicopter/Other",
+    "image_url": "图片URL或路径",
+    "description": "简要描述",
+    "length_m": 机长数值(数字),
+    "wingspan_m": 翼展数值(数字),
+    "height_m": 机高数值(数字),
+    "mtow_kg": 最大起飞重量数值(数字),
+    "empty_weight_kg": 空重数值(数字),
+    "max_payload_kg": 最大载荷数值(数字),
+    "max_speed_kmh": 最大速度数值(数字),
+    "cruise_speed_kmh": 巡航速度数值(数字),
+    "range_km": 航程数值(数字),
+    "endurance_min": 续航时间数值(数字),
+    "ceiling_m": 升限数值(数字),
+    "purpose": ["用途1", "用途2"]
+}}
+
+案例内容：
+{markdown_content}
+"""
+
+# 提取结果磁盘缓存
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "extraction")
+CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+# 长文档分块提取：超过该长度（字符）的案例按章节与表格分块，每块单独请求
+CHUNK_MAX_CHARS = 2500
+CHUNK_MAX_WORKERS = 4
+
+TEXT_FIELDS = ("name", "manufacturer", "type", "image_url", "description")
+
+# 本地解析的数值参数: 字段 -> (标签别名, 量纲, 换算系数)
+LOCAL_FIELDS = {
+    "length_m": (("机长", "全长", "机身长度", "长度", "length"), "m", 1.0),
+    "wingspan_m": (("翼展", "wingspan", "span"), "m", 1.0),
+    "height_m": (("机高", "全高", "机身高度", "height"), "m", 1.0),
+    "mtow_kg": (("最大起飞重量", "最大起飞质量", "起飞重量", "总重", "mtow", "max takeoff weight"), "kg", 1.0),
+    "empty_weight_kg": (("空重", "空机重量", "空机质量", "empty weight"), "kg", 1.0),
+    "max_payload_kg": (("最大载荷", "最大任务载荷", "有效载荷", "任务载荷", "payload", "max payload"), "kg", 1.0),
+    "max_speed_kmh": (("最大速度", "最大飞行速度", "max speed"), "km/h", 1.0),
+    "cruise_speed_kmh": (("巡航速度", "cruise speed"), "km/h", 1.0),
+    "range_km": (("航程", "最大航程", "巡航距离", "range"), "m", 1e-3),
+    "endurance_min": (("续航时间", "续航", "航时", "最大航时", "endurance"), "min", 1.0),
+    "ceiling_m": (("升限", "实用升限", "最大飞行高度", "ceiling", "service ceiling"), "m", 1.0),
+}
+
+# 单位 -> (量纲, 换算到量纲单位的系数)
+LOCAL_UNITS = {
+    "mm": ("m", 1e-3), "cm": ("m", 1e-2), "m": ("m", 1.0), "米": ("m", 1.0),
+    "km": ("m", 1e3), "公里": ("m", 1e3), "千米": ("m", 1e3),
+    "g": ("kg", 1e-3), "kg": ("kg", 1.0), "公斤": ("kg", 1.0), "千克": ("kg", 1.0),
+    "t": ("kg", 1e3), "吨": ("kg", 1e3),
+    "km/h": ("km/h", 1.0), "m/s": ("km/h", 3.6), "kn": ("km/h", 1.852), "节": ("km/h", 1.852),
+    "min": ("min", 1.0), "分钟": ("min", 1.0), "h": ("min", 60.0), "小时": ("min", 60.0),
+}
+
+
+class APIError(Exception):
+    """A failed AI API call; network errors, HTTP 429 and 5xx are retryable."""
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        try:
+            self.retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            self.retry_after = None
+
+    @property
+    def retryable(self):
+        return self.status is None or self.status == 429 or self.status >= 500
+
+
+def _http_error(e):
+    """Build the APIError of a failed HTTP response, including the provider's error message."""
+    # 尝试从响应中提取错误信息
+    error_msg = f"API请求失败 (HTTP {e.response.status_code})"
+    try:
+        error_detail = e.response.json()
+    except ValueError:
+        error_msg += f": {str(e)}"
+    else:
+        # error 可能是 {"message": ...} 对象，也可能直接是字符串
+        error = error_detail.get('error') if isinstance(error_detail, dict) else None
+        if isinstance(error, dict):
+            error_msg += f": {error.get('message', str(error))}"
+        elif error is not None:
+            error_msg += f": {error}"
+    return APIError(error_msg, status=e.response.status_code, retry_after=e.response.headers.get("Retry-After"))
+
+
+def _retry_delay(error, attempt):
+    """Seconds to wait before retrying after a retryable APIError, or None to give up.
+
+    A Retry-After longer than RETRY_MAX_DELAY is not waited out.
+    """
+    if error.retry_after is not None:
+        return max(error.retry_after, 0.0) if error.retry_after <= RETRY_MAX_DELAY else None
+    return min(RETRY_BASE_DELAY * 2 ** attempt * (0.5 + random.random()), RETRY_MAX_DELAY)
+
+
+def build_messages(markdown_content):
+    """Return the chat messages asking the model to extract one case."""
+    # 构建prompt
+    prompt = PROMPT_TEMPLATE.format(markdown_content=markdown_content)
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def extract_uav_info_from_ai(markdown_content, ai_service, api_key, model, base_url=None):
+    """使用AI从Markdown内容中提取机型信息"""
+
+    # 调用AI API
+    client = get_client(base_url or PROVIDERS[ai_service]["base_url"])
+    content = client.chat(build_messages(markdown_content), api_key, model, CHAT_TEMPERATURE, CHAT_MAX_TOKENS)
+
+    # 解析JSON
+    return parse_ai_response(content)
+
+
+class LLMClient:
+    """Chat-completions client for one OpenAI-compatible base URL.
+
+    Holds a pooled keep-alive ``requests.Session`` so repeated calls reuse
+    connections (and TLS sessions). Connection failures are retried by the
+    transport; HTTP errors are raised as APIError for the caller's retry
+    policy. Latency and token usage of every call are accumulated in stats().
+    """
+
+    def __init__(self, base_url, timeout=(5, 60), connect_retries=2, pool_size=8):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=Retry(total=connect_retries, connect=connect_retries,
+                                                read=0, status=0, backoff_factor=0.5))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "errors": 0, "latency_s": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def _record(self, latency, usage=None, error=False):
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["errors"] += int(error)
+            self._stats["latency_s"] += latency
+            if usage:
+                self._stats["prompt_tokens"] += usage.get("prompt_tokens") or 0
+                self._stats["completion_tokens"] += usage.get("completion_tokens") or 0
+
+    def stats(self):
+        """Return call count, errors, total/average latency and token totals."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_latency_s"] = stats["latency_s"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+    def chat(self, messages, api_key, model, temperature=0.3, max_tokens=2000):
+        """Send a chat completion and return the reply text."""
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+        data = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+
+        start = time.perf_counter()
+        try:
+            response = self.session.post(f"{self.base_url}/chat/completions", headers=headers, json=data,
+                                         timeout=self.timeout)
+            response.raise_for_status()
+            result = response.json()
+            # 提取回复内容
+            content = result['choices'][0]['message']['content']
+        except requests.exceptions.HTTPError as e:
+            self._record(time.perf_counter() - start, error=True)
+            raise _http_error(e) from e
+        except requests.exceptions.RequestException as e:
+            self._record(time.perf_counter() - start, error=True)
+            raise APIError(f"网络请求失败: {str(e)}") from e
+
+        self._record(time.perf_counter() - start, result.get("usage"))
+        return content
+
+    def stream_chat(self, messages, api_key, model, temperature=0.3, max_tokens=2000):
+        """Send a streaming chat completion and yield reply text as server-sent events arrive.
+
+        Closing the generator early closes the connection, which is how a
+        malformed reply is aborted.
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream",
+            "Authorization": f"Bearer {api_key}"
+        }
+        data = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+
+        start = time.perf_counter()
+        error = True
+        try:
+            with self.session.post(f"{self.base_url}/chat/completions", headers=headers, json=data,
+                                   timeout=self.timeout, stream=True) as response:
+                try:
+                    response.raise_for_status()
+                except requests.exceptions.HTTPError as e:
+                    # 须在连接关闭前读取错误响应体
+                    raise _http_error(e) from e
+                for line in response.iter_lines(decode_unicode=False):
+                    if not line.startswith(b"data:"):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == b"[DONE]":
+                        break
+                    event = json.loads(payload)
+                    choices = event.get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        yield delta
+                error = False
+        except requests.exceptions.RequestException as e:
+            raise APIError(f"网络请求失败: {str(e)}") from e
+        finally:
+            self._record(time.perf_counter() - start, error=error)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url):
+    """Return the process-wide LLMClient of a base URL."""
+    with _clients_lock:
+        if base_url not in _clients:
+            _clients[base_url] = LLMClient(base_url)
+        return _clients[base_url]
+
+
+class IncrementalJSONParser:
+    """Parse a streamed top-level JSON object, emitting each member once its value is complete.
+
+    Text before the opening brace (a ```json fence or a short preamble) is
+    skipped; more than ``max_preamble`` characters of it, or any syntax
+    error inside the object, raises ValueError so the stream can be aborted.
+    """
+
+    def __init__(self, max_preamble=200):
+        self.max_preamble = max_preamble
+        self.result = {}
+        self.done = False
+        self._state = "preamble"
+        self._skipped = 0
+        self._buffer = []
+        self._key = None
+        self._in_string = False
+        self._escape = False
+        self._depth = 0
+
+    def feed(self, text):
+        """Consume more text; return the (key, value) pairs completed by it."""
+        completed = []
+        for char in text:
+            if self.done:
+                break
+            state = self._state
+            if state == "preamble":
+                if char == "{":
+                    self._state = "key"
+                elif not char.isspace():
+                    self._skipped += 1
+                    if self._skipped > self.max_preamble:
+                        raise ValueError("AI返回的内容不是JSON对象")
+            elif state == "key":
+                if char == '"':
+                    self._state, self._buffer = "key_string", []
+                elif char == "}":
+                    self.done = True
+                elif not (char.isspace() or char == ","):
+                    raise ValueError(f"JSON格式错误：意外的字符 {char!r}")
+            elif state == "key_string":
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._key = json.loads('"' + "".join(self._buffer) + '"')
+                    self._state = "colon"
+                    continue
+                self._buffer.append(char)
+            elif state == "colon":
+                if char == ":":
+                    self._state, self._buffer, self._depth = "value", [], 0
+                elif not char.isspace():
+                    raise ValueError(f"JSON格式错误：键 {self._key!r} 后缺少冒号")
+            else:  # value
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif char == "\\":
+                        self._escape = True
+                    elif char == '"':
+                        self._in_string = False
+                elif char == '"':
+                    self._in_string = True
+                elif char in "[{":
+                    self._depth += 1
+                elif char in "]}" and self._depth > 0:
+                    self._depth -= 1
+                elif char in ",}" and self._depth == 0:
+                    raw = "".join(self._buffer).strip()
+                    try:
+                        value = json.loads(raw)
+                    except ValueError:
+                        raise ValueError(f"JSON格式错误：键 {self._key!r} 的值无法解析") from None
+                    self.result[self._key] = value
+                    completed.append((self._key, value))
+                    self._state = "key"
+                    self.done = char == "}"
+                    continue
+                self._buffer.append(char)
+        return completed
+
+
+def parse_ai_response(content):
+    """解析AI返回的内容，提取JSON数据"""
+    try:
+        # 尝试直接解析
+        return json.loads(content)
+    except json.JSONDecodeError:
+        # 如果直接解析失败，尝试提取JSON部分
+        # 查找JSON起始和结束位置
+        json_match = re.search(r'\{[\s\S]*\}', content)
+        if json_match:
+            try:
+                return json.loads(json_match.group())
+            except json.JSONDecodeError:
+                pass
+
+        # 尝试查找markdown代码块中的JSON
+        code_block_match = re.search(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```', content)
+        if code_block_match:
+            try:
+                return json.loads(code_block_match.group(1))
+            except json.JSONDecodeError:
+                pass
+
+        raise ValueError("无法解析AI返回的JSON数据")
+
+
+def add_extracted_model(data):
+    """将提取的机型数据添加到机型库"""
+    df = load_data("uav_models.json")
+
+    # 数据验证
+    name = data.get("name", "") or ""
+    manufacturer = data.get("manufacturer", "") or ""
+
+    # 必填字段验证
+    if not name:
+        raise ValueError("型号名称不能为空")
+    if not manufacturer:
+        raise ValueError("厂商不能为空")
+
+    # 检查型号是否已存在
+    if not df.empty and name in df["name"].values:
+        raise ValueError(f"型号名称 '{name}' 已存在，请使用修改功能更新现有机型")
+
+    # 类型枚举验证
+    valid_types = ["Fixed-Wing", "Multi-Rotor", "VTOL", "Helicopter", "Other"]
+    uav_type = data.get("type", "Other")
+    if uav_type not in valid_types:
+        raise ValueError(f"无效的机型类型: {uav_type}，必须是: {', '.join(valid_types)}")
+
+    # 数值验证（确保为非负数）
+    def validate_non_negative(value, field_name):
+        if value is None:
+            return 0.0
+        try:
+            return max(0.0, float(value))
+        except (ValueError, TypeError):
+            return 0.0
+
+    # 创建新机型
+    new_model = {
+        "id": allocate_ids()[0],
+        "name": name,
+        "manufacturer": manufacturer,
+        "type": uav_type,
+        "image_url": data.get("image_url") if data.get("image_url") else None,
+        "description": data.get("description", "").strip(),
+        "length_m": validate_non_negative(data.get("length_m"), "机长"),
+        "wingspan_m": validate_non_negative(data.get("wingspan_m"), "翼展"),
+        "height_m": validate_non_negative(data.get("height_m"), "机高"),
+        "mtow_kg": validate_non_negative(data.get("mtow_kg"), "最大起飞重量"),
+        "empty_weight_kg": validate_non_negative(data.get("empty_weight_kg"), "空重"),
+        "max_payload_kg": validate_non_negative(data.get("max_payload_kg"), "最大载荷"),
+        "max_speed_kmh": validate_non_negative(data.get("max_speed_kmh"), "最大速度"),
+        "cruise_speed_kmh": validate_non_negative(data.get("cruise_speed_kmh"), "巡航速度"),
+        "range_km": validate_non_negative(data.get("range_km"), "航程"),
+        "endurance_min": int(validate_non_negative(data.get("endurance_min"), "续航时间")),
+        "ceiling_m": int(validate_non_negative(data.get("ceiling_m"), "升限")),
+        "purpose": [p.strip() for p in data.get("purpose") or [] if isinstance(p, str) and p.strip()],
+        "custom_params": data.get("custom_params", {})
+    }
+
+    # 添加到数据
+    insert_record("uav_models.json", new_model)
+
+    return True
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate_per_minute`` calls with bursts of up to five seconds' worth."""
+
+    def __init__(self, rate_per_minute):
+        self.interval = 60.0 / rate_per_minute
+        self.capacity = max(1.0, rate_per_minute / 12.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) / self.interval)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self.interval
+            time.sleep(wait)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(ai_service):
+    """Return the process-wide rate limiter of one AI service."""
+    with _limiters_lock:
+        if ai_service not in _limiters:
+            _limiters[ai_service] = RateLimiter(PROVIDER_RATE_LIMITS.get(ai_service, 60))
+        return _limiters[ai_service]
+
+
+class ExtractionCache:
+    """On-disk cache of extraction results, bounded by total size.
+
+    Keys hash the case content, the system prompt and prompt template, the
+    sampling parameters, the service, model and base URL, so any change to
+    one of them misses. Least recently used
+    entries are evicted once the directory exceeds ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(markdown_content, ai_service, model, base_url=None):
+        sha = hashlib.sha256()
+        for part in (SYSTEM_PROMPT, PROMPT_TEMPLATE, repr(CHAT_TEMPERATURE), repr(CHAT_MAX_TOKENS),
+                     ai_service, model, base_url or "", markdown_content):
+            sha.update(part.encode("utf-8"))
+            sha.update(b"\0")
+        return sha.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def get(self, key):
+        """Return the cached result, or None."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        return data
+
+    def put(self, key, data):
+        """Store a result and evict old entries past the size bound."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        entries, total = [], 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Delete every cached result."""
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, name))
+
+
+extraction_cache = ExtractionCache()
+
+
+def extract_with_retries(markdown_content, ai_service, api_key, model, base_url=None, retries=MAX_RETRIES,
+                         force_refresh=False):
+    """Cached, rate-limited extract_uav_info_from_ai with exponential backoff.
+
+    Returns (data, attempts); attempts is 0 when the result came from
+    extraction_cache. force_refresh skips the cache lookup but still stores
+    the new result.
+    """
+    key = ExtractionCache.key(markdown_content, ai_service, model, base_url)
+    if not force_refresh:
+        cached = extraction_cache.get(key)
+        if cached is not None:
+            return cached, 0
+
+    limiter = get_rate_limiter(ai_service)
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            data = extract_uav_info_from_ai(markdown_content, ai_service, api_key, model, base_url)
+            if data:
+                extraction_cache.put(key, data)
+            return data, attempt + 1
+        except APIError as e:
+            delay = _retry_delay(e, attempt)
+            if not e.retryable or attempt == retries or delay is None:
+                raise
+            time.sleep(delay)
+
+
+def stream_extract(markdown_content, ai_service, api_key, model, base_url=None, retries=MAX_RETRIES,
+                   force_refresh=False):
+    """Yield (key, value) pairs of an extraction as soon as the streamed reply completes each one.
+
+    A cached result is yielded at once. Opening the stream is retried with
+    the same backoff as extract_with_retries until the first text arrives;
+    after that errors are raised. A malformed reply raises ValueError
+    as soon as it is detected and the stream is closed; a complete result is
+    stored in extraction_cache under the same key as extract_with_retries.
+    """
+    key = ExtractionCache.key(markdown_content, ai_service, model, base_url)
+    if not force_refresh:
+        cached = extraction_cache.get(key)
+        if cached is not None:
+            yield from cached.items()
+            return
+
+    limiter = get_rate_limiter(ai_service)
+    client = get_client(base_url or PROVIDERS[ai_service]["base_url"])
+    messages = build_messages(markdown_content)
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        stream = client.stream_chat(messages, api_key, model, CHAT_TEMPERATURE, CHAT_MAX_TOKENS)
+        try:
+            first = next(stream, "")
+            break
+        except APIError as e:
+            delay = _retry_delay(e, attempt)
+            if not e.retryable or attempt == retries or delay is None:
+                raise
+            time.sleep(delay)
+
+    parser = IncrementalJSONParser()
+    try:
+        yield from parser.feed(first)
+        for delta in stream:
+            yield from parser.feed(delta)
+    finally:
+        stream.close()
+
+    if not parser.done:
+        raise ValueError("AI返回的JSON不完整")
+    extraction_cache.put(key, parser.result)
+
+
+_HEADING = re.compile(r"^(#{1,6})\s+\S")
+_TABLE_ROW = re.compile(r"^\s*\|.*\|\s*$")
+_TABLE_RULE = re.compile(r"^\s*\|?(\s*:?-{3,}:?\s*\|)+\s*(:?-{3,}:?\s*)?$")
+_LABELLED = re.compile(r"^\s*(?:[-*+]\s+|\d+[.)]\s+)?(.{1,40}?)\s*[：:]\s*(.+)$")
+_LABEL_NOISE = re.compile(r"[（(][^）)]*[）)]?|[*_`\s]")
+_LOCAL_QUANTITY = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(" + "|".join(re.escape(u) for u in sorted(LOCAL_UNITS, key=len, reverse=True)) +
+    r")(?![A-Za-z])"
+)
+_LOCAL_ALIASES = {alias: field for field, (aliases, _, _) in LOCAL_FIELDS.items() for alias in aliases}
+
+
+def _sections(markdown_content):
+    """Yield (heading trail, lines, is_table) blocks; tables are kept apart from prose."""
+    trail, lines, in_table, in_code = [], [], False, False
+    for line in markdown_content.splitlines():
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        heading = None if in_code else _HEADING.match(line)
+        if heading:
+            if any(l.strip() for l in lines):
+                yield trail, lines, in_table
+            level = len(heading.group(1))
+            trail = [h for h in trail if len(h) - len(h.lstrip("#")) < level] + [line.strip()]
+            lines, in_table = [], False
+            continue
+        is_row = not in_code and bool(_TABLE_ROW.match(line))
+        if is_row != in_table:
+            if any(l.strip() for l in lines):
+                yield trail, lines, in_table
+            lines, in_table = [], is_row
+        lines.append(line)
+    if any(l.strip() for l in lines):
+        yield trail, lines, in_table
+
+
+def _pieces(lines, is_table, max_chars):
+    """Cut one block into runs of lines of at most max_chars; table pieces repeat the header rows."""
+    header = lines[:2] if is_table and len(lines) > 2 and _TABLE_RULE.match(lines[1]) else []
+    body = lines[len(header):]
+    budget = max(max_chars - sum(len(l) + 1 for l in header), 1)
+    piece, size = [], 0
+    for line in body:
+        while len(line) > budget:
+            if piece:
+                yield header + piece
+                piece, size = [], 0
+            yield header + [line[:budget]]
+            line = line[budget:]
+        if piece and size + len(line) + 1 > budget:
+            yield header + piece
+            piece, size = [], 0
+        piece.append(line)
+        size += len(line) + 1
+    if piece:
+        yield header + piece
+
+
+def split_markdown(markdown_content, max_chars=CHUNK_MAX_CHARS):
+    """Split a case into chunks at Markdown headings and around tables.
+
+    Consecutive prose sections are packed together up to max_chars. Every
+    chunk also repeats the headings it sits under, so the model keeps the
+    document title and section context. Tables the local parser can read
+    become chunks of their own. Chunks are returned in document order, which
+    merge_partials relies on, as dicts with ``text`` and ``table`` (True for
+    those locally parseable tables).
+    """
+    chunks = []
+    shown, current, size = [], [], 0
+    for trail, lines, is_table in _sections(markdown_content):
+        for piece in _pieces(lines, is_table, max_chars):
+            if is_table and parse_local_fields("\n".join(piece)):
+                # 先输出表格之前的正文，保持文档顺序
+                if current:
+                    chunks.append({"text": "\n".join(current).strip(), "table": False})
+                    shown, current, size = [], [], 0
+                chunks.append({"text": "\n".join(trail + piece).strip(), "table": True})
+                continue
+            common = 0
+            while common < min(len(shown), len(trail)) and shown[common] == trail[common]:
+                common += 1
+            addition = trail[common:] + piece
+            addition_size = sum(len(l) + 1 for l in addition)
+            if current and size + addition_size > max_chars:
+                chunks.append({"text": "\n".join(current).strip(), "table": False})
+                addition = trail + piece
+                current, size = [], 0
+                addition_size = sum(len(l) + 1 for l in addition)
+            current.extend(addition)
+            shown, size = trail, size + addition_size
+    if current:
+        chunks.append({"text": "\n".join(current).strip(), "table": False})
+    return chunks
+
+
+def _local_value(text, dimension, scale):
+    for match in _LOCAL_QUANTITY.finditer(re.sub(r"(?<=\d),(?=\d{3})", "", text)):
+        unit_dimension, factor = LOCAL_UNITS[match.group(2)]
+        if unit_dimension == dimension:
+            return round(float(match.group(1)) * factor * scale, 6)
+    return None
+
+
+def parse_local_fields(markdown_text):
+    """Read numeric parameters from "名称：数值单位" lines and table rows without calling the AI.
+
+    A table row is read as label cell followed by value cells; the last
+    cell holding a quantity of the right dimension wins, which picks the
+    final figure in "指标 | 拟定值 | 实际值 | 符合情况" style tables. A label
+    seen again later in the text overrides the earlier value.
+    """
+    found = {}
+    for line in markdown_text.splitlines():
+        if _TABLE_ROW.match(line):
+            if _TABLE_RULE.match(line):
+                continue
+            cells = [c.strip() for c in line.strip().strip("|").split("|")]
+            label, values = cells[0], cells[:0:-1]
+        else:
+            match = _LABELLED.match(line)
+            if not match:
+                continue
+            label, values = match.group(1), [match.group(2)]
+        field = _LOCAL_ALIASES.get(_LABEL_NOISE.sub("", label).lower())
+        if field is None:
+            continue
+        _, dimension, scale = LOCAL_FIELDS[field]
+        for value in values:
+            number = _local_value(value, dimension, scale)
+            if number is not None:
+                found[field] = int(round(number)) if field in ("endurance_min", "ceiling_m") else number
+                break
+    return found
+
+
+def merge_partials(partials):
+    """Merge partial records, given in document order, into one record.
+
+    Text fields take the first non-empty value (a specific type beats
+    "Other") and purpose is the union. A numeric field takes the value most
+    partials agree on; ties go to the later one, since design reports revise
+    their figures towards the end. Returns (data, conflicts), where
+    conflicts maps each numeric field whose partials disagreed to the
+    distinct values seen.
+    """
+    data, conflicts = {}, {}
+    for field in TEXT_FIELDS:
+        values = [p.get(field) for p in partials if isinstance(p.get(field), str) and p.get(field).strip()]
+        if field == "type":
+            values = [v for v in values if v != "Other"] or values
+        data[field] = values[0].strip() if values else None
+
+    purpose = []
+    for p in partials:
+        for item in p.get("purpose") or []:
+            if isinstance(item, str) and item.strip() and item.strip() not in purpose:
+                purpose.append(item.strip())
+    data["purpose"] = purpose
+
+    for field in LOCAL_FIELDS:
+        votes, last_seen = {}, {}
+        for i, p in enumerate(partials):
+            try:
+                value = round(float(p.get(field)), 6)
+            except (TypeError, ValueError):
+                continue
+            if value > 0:
+                votes[value] = votes.get(value, 0) + 1
+                last_seen[value] = i
+        if not votes:
+            data[field] = None
+            continue
+        data[field] = max(votes, key=lambda v: (votes[v], last_seen[v]))
+        if len(votes) > 1:
+            conflicts[field] = sorted(votes)
+    return data, conflicts
+
+
+def extract_chunked(markdown_content, ai_service, api_key, model, base_url=None, max_chars=CHUNK_MAX_CHARS,
+                    max_workers=CHUNK_MAX_WORKERS, force_refresh=False, progress=None):
+    """Map-reduce extraction of a long case: split it, extract the chunks in parallel, merge.
+
+    Table chunks the local parser can read never reach the AI. Every other
+    chunk goes through extract_with_retries, so it is cached, rate-limited
+    and retried on its own. A failed chunk only loses its own fields; the
+    first error is raised when no chunk produced anything. Returns a dict
+    with ``data``, ``conflicts``, ``chunks``, ``local_chunks``, ``attempts``
+    (AI calls made) and ``errors``.
+    """
+    chunks = split_markdown(markdown_content, max_chars)
+    done = 0
+    done_lock = threading.Lock()
+
+    def run(chunk):
+        nonlocal done
+        local = parse_local_fields(chunk["text"])
+        result = {"local": local, "data": None, "attempts": 0, "error": None}
+        if not (chunk["table"] and local):
+            try:
+                result["data"], result["attempts"] = extract_with_retries(
+                    chunk["text"], ai_service, api_key, model, base_url, force_refresh=force_refresh)
+            except Exception as e:
+                result["error"] = e
+        with done_lock:
+            done += 1
+            if progress is not None:
+                progress(done, len(chunks))
+        return result
+
+    if progress is not None:
+        progress(0, len(chunks))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract-chunk") as pool:
+        results = list(pool.map(run, chunks))
+
+    # 同一分块内本地解析结果排在AI结果之后，票数相同时优先采用
+    partials = []
+    for r in results:
+        if isinstance(r["data"], dict):
+            partials.append(r["data"])
+        partials.append(r["local"])
+    errors = [r["error"] for r in results if r["error"] is not None]
+    if errors and not any(isinstance(r["data"], dict) and r["data"] for r in results):
+        raise errors[0]
+
+    data, conflicts = merge_partials(partials)
+    return {
+        "data": data,
+        "conflicts": conflicts,
+        "chunks": len(chunks),
+        "local_chunks": sum(1 for c, r in zip(chunks, results) if c["table"] and r["local"]),
+        "attempts": sum(r["attempts"] for r in results),
+        "errors": [str(e) for e in errors],
+    }
+
+
+def extract_batch(cases, ai_service, api_key, model, base_url=None, max_workers=4, progress=None,
+                  force_refresh=False):
+    """Extract every case concurrently on a bounded thread pool.
+
+    cases is a list of get_case_files() entries. Returns one dict per case,
+    in input order, with ``case``, ``data`` (None on failure), ``error`` and
+    ``attempts`` (0 for cached results) — the review queue shown on the case page.
+    """
+    done = 0
+    done_lock = threading.Lock()
+
+    def run(case):
+        nonlocal done
+        result = {"case": case["name"], "data": None, "error": None, "attempts": 0}
+        try:
+            content = read_case_file(case["filename"])
+            if content is None:
+                raise ValueError("无法读取案例文件")
+            if len(content) > CHUNK_MAX_CHARS:
+                chunked = extract_chunked(content, ai_service, api_key, model, base_url, force_refresh=force_refresh)
+                result["data"], result["attempts"] = chunked["data"], chunked["attempts"]
+            else:
+                result["data"], result["attempts"] = extract_with_retries(content, ai_service, api_key, model,
+                                                                          base_url, force_refresh=force_refresh)
+        except Exception as e:
+            result["error"] = str(e)
+        with done_lock:
+            done += 1
+            if progress is not None:
+                progress(done, len(cases))
+        return result
+
+    if progress is not None:
+        progress(0, len(cases))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract") as pool:
+        return list(pool.map(run, cases))
@@ -0,0 +1,260 @@
+"""Image derivatives served to the pages instead of full-resolution originals."""
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image, ImageOps, features
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+THUMB_DIR = os.path.join(CACHE_DIR, "thumbs")
+REMOTE_DIR = os.path.join(CACHE_DIR, "remote")
+
+# 缩略图规格: 名称 -> (宽, 高, 是否裁剪填满)
+THUMB_SIZES = {
+    "grid": (320, 240, True),
+    "detail": (960, 720, False),
+    "hero": (1600, 900, False),
+}
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp")
+THUMB_QUALITY = 82
+THUMB_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+THUMB_EXT = ".webp" if THUMB_FORMAT == "WEBP" else ".jpg"
+
+_hash_lock = threading.Lock()
+_source_hashes = {}
+
+
+def _source_hash(path):
+    """SHA-1 of a source file, memoized by (path, mtime, size)."""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _hash_lock:
+        digest = _source_hashes.get(key)
+    if digest is None:
+        sha = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with _hash_lock:
+            _source_hashes[key] = digest
+    return digest
+
+
+def _render(path, width, height, crop):
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        if crop:
+            image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        else:
+            image.thumbnail((width, height), Image.LANCZOS)
+        if THUMB_FORMAT == "JPEG" or image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha and THUMB_FORMAT == "WEBP" else "RGB")
+        return image
+
+
+def thumbnail(path, size="grid"):
+    """Return the path of a cached derivative of a local or remote image.
+
+    Derivatives are keyed by the source content hash and the size name, so
+    they are built once per source file and rebuilt only when it changes.
+    URLs are first fetched through remote_images. Missing files, URLs that
+    could not be fetched and images Pillow cannot read are returned unchanged.
+    """
+    if path and str(path).startswith("http"):
+        path = remote_images.fetch(path)
+    if not path or str(path).startswith("http") or not os.path.isfile(path):
+        return path
+    width, height, crop = THUMB_SIZES[size]
+    try:
+        digest = _source_hash(path)
+        target = os.path.join(THUMB_DIR, f"{digest}_{size}_{width}x{height}{THUMB_EXT}")
+        if os.path.exists(target):
+            return target
+        image = _render(path, width, height, crop)
+        os.makedirs(THUMB_DIR, exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        image.save(tmp_path, THUMB_FORMAT, quality=THUMB_QUALITY)
+        os.replace(tmp_path, target)
+        return target
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return path
+
+
+def clear_thumbnails():
+    """Delete every cached derivative; they are rebuilt on demand."""
+    if not os.path.isdir(THUMB_DIR):
+        return 0
+    removed = 0
+    for name in os.listdir(THUMB_DIR):
+        os.remove(os.path.join(THUMB_DIR, name))
+        removed += 1
+    return removed
+
+
+class RemoteImageCache:
+    """Fetch remote images once and keep them on disk.
+
+    Each URL is stored as ``<sha1(url)>`` with a ``.json`` sidecar holding
+    the ETag / Last-Modified validators. Copies older than ``revalidate_after``
+    seconds are revalidated with a conditional GET; a 304 keeps the bytes.
+    When the directory grows past ``max_bytes`` the least recently used
+    files are evicted. Requests share one pooled session.
+
+    A failed fetch is remembered for ``miss_ttl`` seconds, doubling with
+    each further failure up to ``max_miss_ttl``; until then the URL (or the
+    stale copy) is returned without touching the network, so a dead host
+    does not stall every rerun.
+    """
+
+    def __init__(self, cache_dir=REMOTE_DIR, max_bytes=200 * 1024 * 1024, revalidate_after=3600,
+                 max_file_bytes=20 * 1024 * 1024, timeout=(3.05, 10), session=None, miss_ttl=30,
+                 max_miss_ttl=900):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self.max_file_bytes = max_file_bytes
+        self.timeout = timeout
+        self.miss_ttl = miss_ttl
+        self.max_miss_ttl = max_miss_ttl
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        # 失败记录: URL -> (下次重试时间, 连续失败次数)
+        self._misses = {}
+
+    def _paths(self, url):
+        # 保留图片扩展名，便于按文件名识别类型
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        if ext in IMAGE_EXTS:
+            key += ext
+        return os.path.join(self.cache_dir, key), os.path.join(self.cache_dir, key + ".json")
+
+    def _url_lock(self, url):
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def _backing_off(self, url):
+        with self._lock:
+            miss = self._misses.get(url)
+        return miss is not None and miss[0] > time.monotonic()
+
+    def _record_miss(self, url):
+        with self._lock:
+            failures = self._misses.get(url, (0, 0))[1] + 1
+            ttl = min(self.miss_ttl * 2 ** (failures - 1), self.max_miss_ttl)
+            self._misses[url] = (time.monotonic() + ttl, failures)
+
+    def fetch(self, url):
+        """Return a local path for url, or url itself if it cannot be fetched."""
+        data_path, meta_path = self._paths(url)
+        # 同一URL只允许一个下载，其余请求等待后直接使用缓存
+        with self._url_lock(url):
+            if self._backing_off(url):
+                return data_path if os.path.exists(data_path) else url
+            meta = None
+            if os.path.exists(data_path):
+                try:
+                    with open(meta_path, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    meta = {}
+                if time.time() - meta.get("checked_at", 0) < self.revalidate_after:
+                    os.utime(data_path)
+                    return data_path
+
+            headers = {}
+            if meta and meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta and meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+            try:
+                with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                    if response.status_code == 304 and meta is not None:
+                        with self._lock:
+                            self._misses.pop(url, None)
+                        meta["checked_at"] = time.time()
+                        self._write_meta(meta_path, meta)
+                        os.utime(data_path)
+                        return data_path
+                    response.raise_for_status()
+                    body = self._read_body(response)
+                    meta = {
+                        "url": url,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "content_type": response.headers.get("Content-Type"),
+                        "checked_at": time.time(),
+                    }
+            except (requests.RequestException, ValueError):
+                # 网络失败时继续使用旧副本，并在退避期内不再请求
+                self._record_miss(url)
+                return data_path if meta is not None else url
+            with self._lock:
+                self._misses.pop(url, None)
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{data_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, data_path)
+            self._write_meta(meta_path, meta)
+        self._evict()
+        return data_path
+
+    def _read_body(self, response):
+        chunks, size = [], 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > self.max_file_bytes:
+                raise ValueError(f"remote image larger than {self.max_file_bytes} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _write_meta(self, meta_path, meta):
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def _evict(self):
+        entries, total = [], 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith((".json", ".tmp")):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for stale in (path, path + ".json"):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+    def clear(self):
+        """Delete every cached remote image and forget failed fetches."""
+        with self._lock:
+            self._misses.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, name))
+
+
+remote_images = RemoteImageCache()
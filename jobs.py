@@ -0,0 +1,104 @@
+"""Background job runner shared by every Streamlit session in the process."""
+import itertools
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobRunner:
+    """Run callables on a worker pool and keep a table of their state.
+
+    The callable receives a ``progress(processed, total=None)`` keyword
+    argument it can call to report how far it got. Its return value is
+    stored as the job result; a ``(success, message)`` tuple with a false
+    success marks the job as failed.
+    """
+
+    def __init__(self, max_workers=1, keep=50):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._keep = keep
+
+    def submit(self, label, func, *args, **kwargs):
+        """Queue func(*args, progress=..., **kwargs) and return the job id."""
+        with self._lock:
+            job_id = next(self._ids)
+            self._jobs[job_id] = {
+                "id": job_id,
+                "label": label,
+                "state": QUEUED,
+                "processed": 0,
+                "total": None,
+                "message": "",
+                "error": None,
+                "result": None,
+                "created_at": datetime.now(),
+                "finished_at": None,
+            }
+            self._prune()
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j["state"] in (DONE, FAILED)]
+        for job in sorted(finished, key=lambda j: j["id"])[:max(0, len(self._jobs) - self._keep)]:
+            del self._jobs[job["id"]]
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _run(self, job_id, func, args, kwargs):
+        self._update(job_id, state=RUNNING)
+
+        def progress(processed, total=None):
+            fields = {"processed": processed}
+            if total is not None:
+                fields["total"] = total
+            self._update(job_id, **fields)
+
+        try:
+            result = func(*args, progress=progress, **kwargs)
+        except Exception as e:
+            self._update(job_id, state=FAILED, error=f"{e}\n{traceback.format_exc()}",
+                         message=str(e), finished_at=datetime.now())
+            return
+
+        state, message = DONE, ""
+        if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], bool):
+            state = DONE if result[0] else FAILED
+            message = result[1]
+        self._update(job_id, state=state, result=result, message=message, finished_at=datetime.now())
+
+    def get(self, job_id):
+        """Return a snapshot of one job, or None if it is unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self):
+        """Return snapshots of all known jobs, newest first."""
+        with self._lock:
+            return [dict(j) for j in sorted(self._jobs.values(), key=lambda j: j["id"], reverse=True)]
+
+    def has_active(self):
+        """Return True while any job is queued or running."""
+        with self._lock:
+            return any(j["state"] in (QUEUED, RUNNING) for j in self._jobs.values())
+
+
+# 导入任务串行执行，避免多个导入同时改写同一数据文件
+import_jobs = JobRunner(max_workers=1)
+
+# AI 批量提取任务
+extraction_jobs = JobRunner(max_workers=1)
@@ -1,8 +1,7 @@
 import streamlit as st
 import pandas as pd
-from utils import load_data, save_data, get_image_path, load_custom_params, add_custom_param, delete_custom_param, ASSETS_DIR
-import os
-from datetime import datetime
+from utils import load_data, insert_record, update_record, delete_record, get_image_path, load_custom_params, add_custom_param, delete_custom_param, allocate_ids, save_asset
+from images import thumbnail
 
 st.set_page_config(page_title="机型库", page_icon="✈️", layout="wide")
 
@@ -18,12 +17,8 @@ if mode == "删除机型" and not df.empty:
     model_to_delete = st.selectbox("选择要删除的机型", df["name"].unique())
     if st.button("🗑️ 确认删除", type="primary"):
         try:
-            # 重新加载数据确保获取最新状态
-            df = load_data("uav_models.json")
-            # 过滤掉要删除的机型
-            df = df[df["name"] != model_to_delete].reset_index(drop=True)
-            # 保存到JSON文件
-            save_data("uav_models.json", df)
+            # 只删除该机型对应的记录
+            delete_record("uav_models.json", model_to_delete)
             st.success(f"已删除机型: {model_to_delete}")
             # 清除session state避免缓存问题
             if 'df' in st.session_state:
@@ -131,18 +126,12 @@ if mode == "添加机型":
 
                 # 处理上传的图片文件
                 if uploaded_image:
-                    # 确保assets目录存在
-                    if not os.path.exists(ASSETS_DIR):
-                        os.makedirs(ASSETS_DIR, exist_ok=True)
                     # 保存上传的文件到assets目录
-                    image_save_path = os.path.join(ASSETS_DIR, uploaded_image.name)
-                    with open(image_save_path, 'wb') as f:
-                        f.write(uploaded_image.getbuffer())
-                    image_url = uploaded_image.name
+                    image_url = save_asset(uploaded_image)
 
                 # Create new model
                 new_model = {
-                    "id": f"uav-{int(datetime.now().timestamp())}",
+                    "id": allocate_ids()[0],
                     "name": name,
                     "manufacturer": manufacturer,
                     "type": type_,
@@ -164,8 +153,7 @@ if mode == "添加机型":
                 }
 
                 # Append to existing data
-                df = pd.concat([df, pd.DataFrame([new_model])], ignore_index=True)
-                save_data("uav_models.json", df)
+                insert_record("uav_models.json", new_model)
                 st.success(f"成功添加机型: {name}")
                 st.rerun()
 
@@ -306,18 +294,17 @@ if mode == "修改机型":
 
                     # 处理上传的图片文件
                     if uploaded_image:
-                        # 确保assets目录存在
-                        if not os.path.exists(ASSETS_DIR):
-                            os.makedirs(ASSETS_DIR, exist_ok=True)
                         # 保存上传的文件到assets目录
-                        image_save_path = os.path.join(ASSETS_DIR, uploaded_image.name)
-                        with open(image_save_path, 'wb') as f:
-                            f.write(uploaded_image.getbuffer())
-                        image_url = uploaded_image.name
+                        image_url = save_asset(uploaded_image)
+
+                    # 保留原ID，缺失时分配新ID
+                    model_id = current_model.get("id")
+                    if not isinstance(model_id, str) or not model_id:
+                        model_id = allocate_ids()[0]
 
                     # Updated model
                     updated_model = {
-                        "id": current_model.get("id", f"uav-{int(datetime.now().timestamp())}"),
+                        "id": model_id,
                         "name": name,
                         "manufacturer": manufacturer,
                         "type": type_,
@@ -338,10 +325,8 @@ if mode == "修改机型":
                         "custom_params": custom_param_values if custom_params else {}
                     }
 
-                    # Update existing data - 删除旧记录并添加新记录
-                    df = df[df["name"] != model_to_edit].reset_index(drop=True)
-                    df = pd.concat([df, pd.DataFrame([updated_model])], ignore_index=True)
-                    save_data("uav_models.json", df)
+                    # Update existing data - 原位替换该机型记录
+                    update_record("uav_models.json", model_to_edit, updated_model)
                     st.success(f"成功修改机型: {name}")
                     st.rerun()
 
@@ -475,7 +460,7 @@ if mode == "浏览数据":
         with c1:
             image_path = get_image_path(model.get("image_url"))
             if image_path:
-                st.image(image_path, caption=model["name"], use_container_width=True)
+                st.image(thumbnail(image_path, "detail"), caption=model["name"], use_container_width=True)
             else:
                 st.info("暂无图片")
 
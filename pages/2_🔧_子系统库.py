@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
-from utils import load_data, get_image_path
-import os
+from utils import load_data, get_image_path, load_spec_index
+from specs import parse_key_specs
+from images import thumbnail
+import math
 
 st.set_page_config(page_title="子系统库", page_icon="🔧", layout="wide")
 
+PAGE_SIZES = [12, 24, 48, 96]
+
 st.title("🔧 无人机子系统库")
 
 df = load_data("subsystems.json")
@@ -16,19 +20,73 @@ else:
     st.sidebar.header("筛选条件")
     categories = df["category"].dropna().unique().tolist()
     selected_categories = st.sidebar.multiselect("选择类别", categories, default=categories)
+
+    # Numeric range filters backed by the sorted spec index
+    spec_index = load_spec_index()
+    spec_ranges = {}
+    if spec_index.size == len(df) and spec_index.specs():
+        spec_labels = {f"{name} ({unit})" if unit else name: (name, unit) for name, unit in spec_index.specs()}
+        selected_specs = st.sidebar.multiselect("按规格范围筛选", list(spec_labels))
+        for label in selected_specs:
+            key = spec_labels[label]
+            low, high = spec_index.bounds(key)
+            if low < high:
+                spec_ranges[key] = st.sidebar.slider(label, min_value=low, max_value=high, value=(low, high))
+            else:
+                spec_ranges[key] = (low, high)
     
-    filtered_df = df[df["category"].isin(selected_categories)]
-    
+    # Sort & page size
+    sort_options = {"名称": "name", "厂商": "manufacturer", "类别": "category"}
+    sort_label = st.sidebar.selectbox("排序方式", list(sort_options))
+    descending = st.sidebar.toggle("降序", value=False)
+    page_size = st.sidebar.selectbox("每页数量", PAGE_SIZES, index=1)
+
+    mask = df["category"].isin(selected_categories).to_numpy()
+    if spec_ranges:
+        mask &= spec_index.mask(spec_ranges)
+    filtered_df = df[mask]
+    sort_col = sort_options[sort_label]
+    if sort_col in filtered_df.columns:
+        # string 类型保留缺失值，na_position 才能把空值排在最后
+        filtered_df = filtered_df.sort_values(sort_col, ascending=not descending, na_position="last",
+                                              key=lambda col: col.astype("string").str.lower())
+
+    # Pagination: only the current page is rendered
+    page_count = max(1, math.ceil(len(filtered_df) / page_size))
+    view_key = (tuple(selected_categories), tuple(sorted(spec_ranges.items())), sort_col, descending, page_size)
+    if st.session_state.get("subsystem_view") != view_key:
+        st.session_state["subsystem_view"] = view_key
+        st.session_state["subsystem_page"] = 1
+    st.session_state["subsystem_page"] = min(max(st.session_state.get("subsystem_page", 1), 1), page_count)
+
+    def _step_page(delta):
+        st.session_state["subsystem_page"] = min(max(st.session_state["subsystem_page"] + delta, 1), page_count)
+
     # Display Grid
     st.markdown(f"共找到 {len(filtered_df)} 个子系统")
-    
-    for _, row in filtered_df.iterrows():
+
+    nav1, nav2, nav3 = st.columns([1, 2, 1])
+    with nav1:
+        st.button("⬅️ 上一页", on_click=_step_page, args=(-1,), disabled=st.session_state["subsystem_page"] <= 1,
+                  use_container_width=True)
+    with nav2:
+        st.number_input(f"页码（共 {page_count} 页）", min_value=1, max_value=page_count, step=1,
+                        key="subsystem_page", label_visibility="collapsed")
+        st.caption(f"第 {st.session_state['subsystem_page']} / {page_count} 页")
+    with nav3:
+        st.button("下一页 ➡️", on_click=_step_page, args=(1,),
+                  disabled=st.session_state["subsystem_page"] >= page_count, use_container_width=True)
+
+    start = (st.session_state["subsystem_page"] - 1) * page_size
+    page_df = filtered_df.iloc[start:start + page_size]
+
+    for _, row in page_df.iterrows():
         with st.container(border=True):
             c1, c2 = st.columns([1, 4])
             with c1:
                 image_path = get_image_path(row.get("image_url"))
                 if image_path:
-                    st.image(image_path, use_container_width=True)
+                    st.image(thumbnail(image_path, "grid"), use_container_width=True)
                 else:
                     st.markdown("📷 暂无图片")
             with c2:
@@ -37,9 +95,8 @@ else:
                 st.write(row["description"])
                 
                 # Show key specs
-                if isinstance(row.get("key_specs"), dict):
-                    specs = row["key_specs"]
-                    cols = st.columns(len(specs)) if specs else []
-                    for i, (k, v) in enumerate(specs.items()):
-                        if i < 4: # Limit to 4 specs display
-                            cols[i].metric(k, v)
+                specs = list(parse_key_specs(row.get("key_specs")).items())[:4] # Limit to 4 specs display
+                if specs:
+                    cols = st.columns(len(specs))
+                    for i, (k, v) in enumerate(specs):
+                        cols[i].metric(k, v)
@@ -1,166 +1,21 @@
 import streamlit as st
-from utils import get_case_files, delete_case_file, save_case_file, load_data, save_data
-import os
-import json
-import re
-from datetime import datetime
-import requests
+from utils import get_case_files, read_case_file, delete_case_file, save_case_file
+from extraction import extract_with_retries, extract_batch, stream_extract, extract_chunked, CHUNK_MAX_CHARS, add_extracted_model, get_client, PROVIDERS
+from jobs import extraction_jobs, QUEUED, RUNNING, DONE
+import time
 import pandas as pd
 
 st.set_page_config(page_title="案例库", page_icon="📖", layout="wide")
 
 st.title("📖 无人机设计案例库")
 
-
-def extract_uav_info_from_ai(markdown_content, ai_service, api_key, model, base_url=None):
-    """使用AI从Markdown内容中提取机型信息"""
-
-    # 构建prompt
-    prompt = f"""
-请从以下无人机案例Markdown内容中提取机型信息，并严格按照JSON格式返回。如果某项信息在内容中未提及，请设置为null或0。
-
-返回的JSON结构必须如下（不要添加任何额外文字）:
-{{
-    "name": "型号名称",
-    "manufacturer": "厂商名称",
-    "type": "Fixed-Wing/Multi-Rotor/VTOL/Helicopter/Other",
-    "image_url": "图片URL或路径",
-    "description": "简要描述",
-    "length_m": 机长数值(数字),
-    "wingspan_m": 翼展数值(数字),
-    "height_m": 机高数值(数字),
-    "mtow_kg": 最大起飞重量数值(数字),
-    "empty_weight_kg": 空重数值(数字),
-    "max_payload_kg": 最大载荷数值(数字),
-    "max_speed_kmh": 最大速度数值(数字),
-    "cruise_speed_kmh": 巡航速度数值(数字),
-    "range_km": 航程数值(数字),
-    "endurance_min": 续航时间数值(数字),
-    "ceiling_m": 升限数值(数字),
-    "purpose": ["用途1", "用途2"]
-}}
-
-案例内容：
-{markdown_content}
-"""
-
-    # 调用AI API
-    if ai_service == "DeepSeek":
-        return call_openai_api(prompt, api_key, model, base_url or "https://api.deepseek.com")
-    elif ai_service == "OpenAI":
-        return call_openai_api(prompt, api_key, model, base_url or "https://api.openai.com/v1")
-    else:  # 通义千问
-        return call_qwen_api(prompt, api_key, model)
-
-
-def call_openai_api(prompt, api_key, model, base_url):
-    """调用OpenAI API"""
-    url = f"{base_url}/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-
-    data = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": "你是一个专业的无人机数据提取助手，请严格按照JSON格式返回提取的机型信息。"},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.3,
-        "max_tokens": 2000
-    }
-
-    try:
-        response = requests.post(url, headers=headers, json=data, timeout=30)
-        response.raise_for_status()
-        result = response.json()
-
-        # 提取回复内容
-        content = result['choices'][0]['message']['content']
-
-        # 解析JSON
-        return parse_ai_response(content)
-    except requests.exceptions.HTTPError as e:
-        # 尝试从响应中提取错误信息
-        error_msg = f"API请求失败 (HTTP {e.response.status_code})"
-        try:
-            error_detail = e.response.json()
-            if 'error' in error_detail:
-                error_msg += f": {error_detail['error'].get('message', str(error_detail['error']))}"
-        except:
-            error_msg += f": {str(e)}"
-        raise Exception(error_msg) from e
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"网络请求失败: {str(e)}") from e
-
-
-def call_qwen_api(prompt, api_key, model):
-    """调用通义千问API"""
-    url = "https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-
-    data = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": "你是一个专业的无人机数据提取助手，请严格按照JSON格式返回提取的机型信息。"},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.3,
-        "max_tokens": 2000
-    }
-
-    try:
-        response = requests.post(url, headers=headers, json=data, timeout=30)
-        response.raise_for_status()
-        result = response.json()
-
-        # 提取回复内容
-        content = result['choices'][0]['message']['content']
-
-        # 解析JSON
-        return parse_ai_response(content)
-    except requests.exceptions.HTTPError as e:
-        # 尝试从响应中提取错误信息
-        error_msg = f"API请求失败 (HTTP {e.response.status_code})"
-        try:
-            error_detail = e.response.json()
-            if 'error' in error_detail:
-                error_msg += f": {error_detail['error'].get('message', str(error_detail['error']))}"
-        except:
-            error_msg += f": {str(e)}"
-        raise Exception(error_msg) from e
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"网络请求失败: {str(e)}") from e
-
-
-def parse_ai_response(content):
-    """解析AI返回的内容，提取JSON数据"""
-    try:
-        # 尝试直接解析
-        return json.loads(content)
-    except json.JSONDecodeError:
-        # 如果直接解析失败，尝试提取JSON部分
-        # 查找JSON起始和结束位置
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except json.JSONDecodeError:
-                pass
-
-        # 尝试查找markdown代码块中的JSON
-        code_block_match = re.search(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```', content)
-        if code_block_match:
-            try:
-                return json.loads(code_block_match.group(1))
-            except json.JSONDecodeError:
-                pass
-
-        raise ValueError("无法解析AI返回的JSON数据")
+# 数值参数的显示名称（分块提取的冲突提示）
+FIELD_LABELS = {
+    "length_m": "机长 (m)", "wingspan_m": "翼展 (m)", "height_m": "机高 (m)",
+    "mtow_kg": "最大起飞重量 (kg)", "empty_weight_kg": "空重 (kg)", "max_payload_kg": "最大载荷 (kg)",
+    "max_speed_kmh": "最大速度 (km/h)", "cruise_speed_kmh": "巡航速度 (km/h)", "range_km": "航程 (km)",
+    "endurance_min": "续航时间 (min)", "ceiling_m": "升限 (m)",
+}
 
 
 def safe_float(value, default=0.0):
@@ -270,71 +125,30 @@ def display_extracted_data(data, case_name):
             st.session_state.extracted_data = data
 
 
-def add_extracted_model(data):
-    """将提取的机型数据添加到机型库"""
-    df = load_data("uav_models.json")
-
-    # 数据验证
-    name = data.get("name", "") or ""
-    manufacturer = data.get("manufacturer", "") or ""
-
-    # 必填字段验证
-    if not name:
-        raise ValueError("型号名称不能为空")
-    if not manufacturer:
-        raise ValueError("厂商不能为空")
-
-    # 检查型号是否已存在
-    if not df.empty and name in df["name"].values:
-        raise ValueError(f"型号名称 '{name}' 已存在，请使用修改功能更新现有机型")
-
-    # 类型枚举验证
-    valid_types = ["Fixed-Wing", "Multi-Rotor", "VTOL", "Helicopter", "Other"]
-    uav_type = data.get("type", "Other")
-    if uav_type not in valid_types:
-        raise ValueError(f"无效的机型类型: {uav_type}，必须是: {', '.join(valid_types)}")
-
-    # 数值验证（确保为非负数）
-    def validate_non_negative(value, field_name):
-        if value is None:
-            return 0.0
-        try:
-            return max(0.0, float(value))
-        except (ValueError, TypeError):
-            return 0.0
-
-    # 创建新机型
-    new_model = {
-        "id": f"uav-{int(datetime.now().timestamp())}",
-        "name": name,
-        "manufacturer": manufacturer,
-        "type": uav_type,
-        "image_url": data.get("image_url") if data.get("image_url") else None,
-        "description": data.get("description", "").strip(),
-        "length_m": validate_non_negative(data.get("length_m"), "机长"),
-        "wingspan_m": validate_non_negative(data.get("wingspan_m"), "翼展"),
-        "height_m": validate_non_negative(data.get("height_m"), "机高"),
-        "mtow_kg": validate_non_negative(data.get("mtow_kg"), "最大起飞重量"),
-        "empty_weight_kg": validate_non_negative(data.get("empty_weight_kg"), "空重"),
-        "max_payload_kg": validate_non_negative(data.get("max_payload_kg"), "最大载荷"),
-        "max_speed_kmh": validate_non_negative(data.get("max_speed_kmh"), "最大速度"),
-        "cruise_speed_kmh": validate_non_negative(data.get("cruise_speed_kmh"), "巡航速度"),
-        "range_km": validate_non_negative(data.get("range_km"), "航程"),
-        "endurance_min": max(0, int(data.get("endurance_min", 0))),
-        "ceiling_m": max(0, int(data.get("ceiling_m", 0))),
-        "purpose": [p.strip() for p in data.get("purpose", []) if isinstance(p, str) and p.strip()],
-        "custom_params": data.get("custom_params", {})
-    }
-
-    # 添加到数据
-    df = pd.concat([df, pd.DataFrame([new_model])], ignore_index=True)
-    save_data("uav_models.json", df)
-
-    return True
-
-
-# Mode selection
-mode = st.radio("选择操作模式", ["浏览案例", "添加案例", "删除案例", "AI提取机型"], horizontal=True)
+def ai_service_settings():
+    """AI服务配置控件，返回 (服务, API Key, 模型, Base URL)"""
+    st.markdown("#### 📝 AI服务配置")
+    ai_service = st.selectbox("选择AI服务", ["DeepSeek", "OpenAI", "通义千问"])
+
+    # 初始化变量
+    base_url = None
+
+    if ai_service == "DeepSeek":
+        api_key = st.text_input("DeepSeek API Key", type="password", placeholder="sk-...")
+        model = st.selectbox("模型", ["deepseek-chat", "deepseek-coder"], index=0)
+    elif ai_service == "OpenAI":
+        api_key = st.text_input("OpenAI API Key", type="password", placeholder="sk-...")
+        model = st.selectbox("模型", ["gpt-4o-mini", "gpt-4o", "gpt-3.5-turbo"], index=0)
+        custom_base_url = st.text_input("Base URL (可选)", value="", placeholder="例如: https://api.openai.com/v1")
+        base_url = custom_base_url if custom_base_url.strip() else None
+    else:  # 通义千问
+        api_key = st.text_input("通义千问 API Key", type="password", placeholder="sk-...")
+        model = st.selectbox("模型", ["qwen-turbo", "qwen-plus", "qwen-max"], index=0)
+
+    return ai_service, api_key, model, base_url
+
+
+mode = st.radio("选择操作模式", ["浏览案例", "添加案例", "删除案例", "AI提取机型", "AI批量提取"], horizontal=True)
 
 if mode == "删除案例":
     st.warning("⚠️ 删除操作不可恢复，请谨慎操作！")
@@ -412,11 +226,9 @@ elif mode == "AI提取机型":
         # 读取案例内容
         case_info = next(c for c in cases if c['name'] == selected_case)
         filepath = case_info['filepath']
+        markdown_content = read_case_file(case_info['filename'])
 
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                markdown_content = f.read()
-
+        if markdown_content is not None:
             # 显示案例内容
             st.divider()
             st.markdown("### 案例内容预览")
@@ -426,41 +238,92 @@ elif mode == "AI提取机型":
             st.divider()
 
             # AI服务配置
-            st.markdown("#### 📝 AI服务配置")
-            ai_service = st.selectbox("选择AI服务", ["DeepSeek", "OpenAI", "通义千问"])
-
-            # 初始化变量
-            base_url = None
-
-            if ai_service == "DeepSeek":
-                api_key = st.text_input("DeepSeek API Key", type="password", placeholder="sk-...")
-                model = st.selectbox("模型", ["deepseek-chat", "deepseek-coder"], index=0)
-            elif ai_service == "OpenAI":
-                api_key = st.text_input("OpenAI API Key", type="password", placeholder="sk-...")
-                model = st.selectbox("模型", ["gpt-4o-mini", "gpt-4o", "gpt-3.5-turbo"], index=0)
-                custom_base_url = st.text_input("Base URL (可选)", value="", placeholder="例如: https://api.openai.com/v1")
-                base_url = custom_base_url if custom_base_url.strip() else None
-            else:  # 通义千问
-                api_key = st.text_input("通义千问 API Key", type="password", placeholder="sk-...")
-                model = st.selectbox("模型", ["qwen-turbo", "qwen-plus", "qwen-max"], index=0)
+            ai_service, api_key, model, base_url = ai_service_settings()
+            force_refresh = st.checkbox("强制刷新（忽略缓存，重新调用AI）", key="single_force_refresh")
+            long_case = len(markdown_content) > CHUNK_MAX_CHARS
+            if long_case:
+                st.caption(f"📑 长文档（{len(markdown_content)} 字）：将按章节与表格分块并行提取后合并，"
+                           "可直接读取的参数表格在本地解析，不调用AI。")
+                streaming = False
+            else:
+                streaming = st.checkbox("流式输出（逐字段显示提取进度）", value=True, key="single_streaming")
 
             if st.button("🤖 开始提取机型信息", type="primary"):
                 if not api_key:
                     st.error("请输入API Key")
+                elif long_case:
+                    with st.spinner("AI正在分块分析案例内容，请稍候..."):
+                        try:
+                            chunked = extract_chunked(markdown_content, ai_service, api_key, model, base_url,
+                                                      force_refresh=force_refresh)
+                        except Exception as e:
+                            st.error(f"提取失败: {str(e)}")
+                            chunked = None
+
+                    if chunked is not None:
+                        extracted_data = chunked["data"]
+                        st.caption(f"共 {chunked['chunks']} 个分块，其中 {chunked['local_chunks']} 个表格分块本地解析；"
+                                   f"调用AI {chunked['attempts']} 次")
+                        if chunked["errors"]:
+                            st.warning(f"{len(chunked['errors'])} 个分块提取失败，其字段可能缺失：{chunked['errors'][0]}")
+                        if chunked["conflicts"]:
+                            st.warning("以下参数在不同章节中的取值不一致，已采用出现最多（同票取靠后章节）的值，请核对：\n" +
+                                       "\n".join(f"- {FIELD_LABELS.get(field, field)}: {' / '.join(f'{v:g}' for v in values)} → 采用 "
+                                                  f"{extracted_data[field]:g}"
+                                                  for field, values in chunked["conflicts"].items()))
+                        if extracted_data.get("name") or any(
+                                isinstance(v, (int, float)) and v for v in extracted_data.values()):
+                            st.success("✅ 提取成功！请确认提取的信息：")
+                            st.session_state.extracted_data = extracted_data
+                            st.session_state.current_case = selected_case
+                            display_extracted_data(extracted_data, selected_case)
+                        else:
+                            st.error("未能提取到有效的机型信息，请尝试其他案例或检查案例内容。")
+                elif streaming:
+                    # 字段解析完成即显示；完整结果返回后再显示可编辑表单
+                    status = st.empty()
+                    preview = st.empty()
+                    extracted_data = {}
+                    status.info("AI正在分析案例内容，字段将逐个显示...")
+                    try:
+                        for key, value in stream_extract(markdown_content, ai_service, api_key, model,
+                                                         base_url, force_refresh=force_refresh):
+                            extracted_data[key] = value
+                            preview.dataframe(
+                                pd.DataFrame({"字段": list(extracted_data),
+                                              "值": [str(v) for v in extracted_data.values()]}),
+                                hide_index=True, use_container_width=True
+                            )
+                    except Exception as e:
+                        status.empty()
+                        st.error(f"提取失败: {str(e)}")
+                    else:
+                        preview.empty()
+                        if extracted_data:
+                            status.success("✅ 提取成功！请确认提取的信息：")
+                            st.session_state.extracted_data = extracted_data
+                            st.session_state.current_case = selected_case
+                            display_extracted_data(extracted_data, selected_case)
+                        else:
+                            status.error("未能提取到有效的机型信息，请尝试其他案例或检查案例内容。")
                 else:
                     with st.spinner("AI正在分析案例内容，请稍候..."):
                         try:
-                            # 调用AI提取函数
-                            extracted_data = extract_uav_info_from_ai(
+                            # 调用AI提取函数（相同内容与模型的结果直接取自缓存）
+                            extracted_data, attempts = extract_with_retries(
                                 markdown_content,
                                 ai_service,
                                 api_key,
                                 model,
-                                base_url
+                                base_url,
+                                force_refresh=force_refresh
                             )
 
                             if extracted_data:
-                                st.success("✅ 提取成功！请确认提取的信息：")
+                                if attempts == 0:
+                                    st.success("✅ 已从缓存载入此前的提取结果（未调用AI）。请确认提取的信息：")
+                                else:
+                                    st.success("✅ 提取成功！请确认提取的信息：")
 
                                 # 保存提取结果到session state（初始数据）
                                 st.session_state.extracted_data = extracted_data
@@ -492,6 +355,135 @@ elif mode == "AI提取机型":
         else:
             st.error(f"无法读取案例文件: {filepath}")
 
+elif mode == "AI批量提取":
+    st.subheader("🤖 AI批量提取机型信息")
+
+    st.info("""
+    💡 **功能说明**: 并发提取多个案例的机型信息，结果进入审核队列，勾选后可一次性添加到机型库。
+
+    请求按服务限速，遇到限流 (HTTP 429)、服务端错误或网络错误时自动指数退避重试。提取在后台执行，离开页面不会中断。
+    """)
+
+    cases = get_case_files()
+
+    if not cases:
+        st.warning("暂无案例，请先添加案例。")
+        st.stop()
+
+    case_names = [c['name'] for c in cases]
+    selected_names = st.multiselect("选择要提取的案例", case_names, default=case_names)
+    max_workers = st.slider("并发数", min_value=1, max_value=8, value=4)
+
+    ai_service, api_key, model, base_url = ai_service_settings()
+    force_refresh = st.checkbox("强制刷新（忽略缓存，重新调用AI）", key="batch_force_refresh")
+
+    job = extraction_jobs.get(st.session_state.get("batch_job"))
+    busy = job is not None and job["state"] in (QUEUED, RUNNING)
+
+    if st.button("🤖 开始批量提取", type="primary", disabled=busy):
+        if not api_key:
+            st.error("请输入API Key")
+        elif not selected_names:
+            st.error("请至少选择一个案例")
+        else:
+            selected_cases = [c for c in cases if c['name'] in set(selected_names)]
+            st.session_state.batch_job = extraction_jobs.submit(
+                f"批量提取 {len(selected_cases)} 个案例", extract_batch,
+                selected_cases, ai_service, api_key, model, base_url, max_workers=max_workers,
+                force_refresh=force_refresh)
+            st.session_state.review_queue = None
+            st.rerun()
+
+    if job is not None:
+        st.divider()
+        if busy:
+            if job["total"]:
+                st.progress(min(job["processed"] / job["total"], 1.0),
+                            text=f"正在提取 {job['processed']} / {job['total']} 个案例")
+            else:
+                st.caption("⏳ 排队中...")
+            time.sleep(1)
+            st.rerun()
+        elif job["state"] != DONE:
+            st.error(f"批量提取失败: {job['message']}")
+        else:
+            # 任务完成后载入审核队列（每个任务只载入一次）
+            if st.session_state.get("review_job") != job["id"]:
+                st.session_state.review_job = job["id"]
+                st.session_state.review_queue = [r for r in job["result"] if r["data"]]
+                st.session_state.review_errors = [r for r in job["result"] if not r["data"]]
+
+            cached = sum(1 for r in job["result"] if r["data"] and r["attempts"] == 0)
+            if cached:
+                st.caption(f"其中 {cached} 个案例的结果来自缓存，未调用AI。")
+            stats = get_client(base_url or PROVIDERS[ai_service]["base_url"]).stats()
+            if stats["calls"]:
+                st.caption(f"{ai_service} 本进程累计调用 {stats['calls']} 次（失败 {stats['errors']} 次），"
+                           f"平均延迟 {stats['avg_latency_s']:.2f} 秒，"
+                           f"tokens：输入 {stats['prompt_tokens']} / 输出 {stats['completion_tokens']}")
+
+            for failed in st.session_state.get("review_errors") or []:
+                st.warning(f"{failed['case']}: {failed['error']}")
+
+            added, errors = st.session_state.pop("review_notice", ([], []))
+            if added:
+                st.success(f"成功添加 {len(added)} 个机型: {', '.join(added)}")
+            for error in errors:
+                st.error(error)
+
+            queue = st.session_state.get("review_queue") or []
+            st.markdown(f"### 📋 审核队列（{len(queue)} 条）")
+            if queue:
+                review_df = pd.DataFrame([{
+                    "添加": True,
+                    "案例": r["case"],
+                    "name": r["data"].get("name") or r["case"],
+                    "manufacturer": r["data"].get("manufacturer") or "",
+                    "type": r["data"].get("type") or "Other",
+                    "mtow_kg": r["data"].get("mtow_kg"),
+                    "max_speed_kmh": r["data"].get("max_speed_kmh"),
+                    "range_km": r["data"].get("range_km"),
+                    "endurance_min": r["data"].get("endurance_min"),
+                } for r in queue])
+                edited = st.data_editor(
+                    review_df,
+                    hide_index=True,
+                    use_container_width=True,
+                    disabled=["案例"],
+                    column_config={
+                        "添加": st.column_config.CheckboxColumn(),
+                        "name": st.column_config.TextColumn("型号名称"),
+                        "manufacturer": st.column_config.TextColumn("厂商"),
+                        "type": st.column_config.SelectboxColumn(
+                            "类型", options=["Fixed-Wing", "Multi-Rotor", "VTOL", "Helicopter", "Other"]),
+                        "mtow_kg": st.column_config.NumberColumn("最大起飞重量 (kg)"),
+                        "max_speed_kmh": st.column_config.NumberColumn("最大速度 (km/h)"),
+                        "range_km": st.column_config.NumberColumn("航程 (km)"),
+                        "endurance_min": st.column_config.NumberColumn("续航时间 (min)"),
+                    },
+                    key=f"review_editor_{job['id']}_{st.session_state.get('review_version', 0)}",
+                )
+
+                if st.button("➕ 批量添加选中机型", type="primary"):
+                    added, remaining, errors = [], [], []
+                    for r, (_, row) in zip(queue, edited.iterrows()):
+                        if not row["添加"]:
+                            remaining.append(r)
+                            continue
+                        data = dict(r["data"])
+                        data.update({k: (row[k] if pd.notna(row[k]) else None)
+                                     for k in review_df.columns if k not in ("添加", "案例")})
+                        try:
+                            add_extracted_model(data)
+                            added.append(data["name"])
+                        except Exception as e:
+                            errors.append(f"{r['case']}: 添加失败: {str(e)}")
+                            remaining.append(r)
+                    st.session_state.review_queue = remaining
+                    st.session_state.review_version = st.session_state.get("review_version", 0) + 1
+                    st.session_state.review_notice = (added, errors)
+                    st.rerun()
+
 else:  # 浏览案例
     cases = get_case_files()
 
@@ -506,34 +498,39 @@ else:  # 浏览案例
 
     selected_case = st.selectbox(
         "选择要查看的案例",
-        ["-- 请选择 --"] + [c['name'] for c in cases]
+        ["-- 请选择 --"] + [c['name'] for c in cases],
+        key="browse_case"
     )
 
+    # 只读取并渲染当前打开的案例
     if selected_case != "-- 请选择 --":
         case_info = next(c for c in cases if c['name'] == selected_case)
-        filepath = case_info['filepath']
-
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                markdown_content = f.read()
+        markdown_content = read_case_file(case_info['filename'])
 
+        if markdown_content is not None:
             st.divider()
             st.markdown(f"## 📖 {selected_case}")
             st.divider()
             st.markdown(markdown_content)
         else:
-            st.error(f"无法读取案例文件: {filepath}")
+            st.error(f"无法读取案例文件: {case_info['filepath']}")
 
-    # Alternative: All cases as expanders
+    # 案例概览：来自缓存的案例索引，不读取全文
     st.divider()
     st.subheader("📄 所有案例预览")
 
-    for case in cases:
-        with st.expander(f"📚 {case['name']}"):
-            filepath = case['filepath']
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                st.markdown(content)
-            except Exception as e:
-                st.error(f"读取失败: {str(e)}")
+    st.dataframe(
+        pd.DataFrame([{
+            "案例": c['name'],
+            "标题": c['title'],
+            "摘要": c['excerpt'],
+            "大小 (KB)": round(c['size'] / 1024, 1),
+            "修改时间": c['mtime'],
+        } for c in cases]),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "摘要": st.column_config.TextColumn(width="large"),
+            "修改时间": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm"),
+        },
+    )
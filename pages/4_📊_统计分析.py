@@ -3,11 +3,7 @@ import pandas as pd
 import numpy as np
 from utils import load_data, load_custom_params
 import plotly.express as px
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error, r2_score
+from regression import REGRESSION_MODELS, build_model, regression_metrics, warm_up
 import os
 import json
 
@@ -15,11 +11,18 @@ st.set_page_config(page_title="统计分析", page_icon="📊", layout="wide")
 
 st.title("📊 统计与拟合分析")
 
+# 后台预加载回归后端，不阻塞页面渲染
+warm_up()
+
+# 本页只用到的列，避免加载描述等大字段
+ANALYSIS_COLUMNS = ["name", "type", "mtow_kg", "max_payload_kg", "endurance_min", "range_km",
+                    "max_speed_kmh", "length_m", "wingspan_m", "custom_params"]
+
 # 添加选项卡
 tab1, tab2 = st.tabs(["回归分析", "计算器"])
 
 with tab1:
-    df = load_data("uav_models.json")
+    df = load_data("uav_models.json", columns=ANALYSIS_COLUMNS)
 
     if df.empty:
         st.warning("请先导入数据。")
@@ -103,7 +106,7 @@ with tab1:
             with c2:
                 y_axis = st.selectbox("Y 轴参数", numeric_cols, index=2, format_func=lambda x: labels.get(x, x))
             with c3:
-                model_type = st.selectbox("回归模型", ["线性回归", "多项式回归 (2阶)", "多项式回归 (3阶)", "随机森林"])
+                model_type = st.selectbox("回归模型", list(REGRESSION_MODELS))
             with c4:
                 show_trendline = st.checkbox("显示拟合曲线", value=True)
 
@@ -140,43 +143,11 @@ with tab1:
                 X = chart_df[[x_axis]].values
                 y = chart_df[y_axis].values
 
-                if model_type == "线性回归":
-                    model = LinearRegression()
-                    model.fit(X, y)
-                    x_line = np.linspace(X.min(), X.max(), 100).reshape(-1, 1)
-                    y_line = model.predict(x_line)
-                    curve_name = "线性回归"
-                    curve_color = "red"
-
-                elif model_type == "多项式回归 (2阶)":
-                    model = Pipeline([
-                        ('poly', PolynomialFeatures(degree=2)),
-                        ('linear', LinearRegression())
-                    ])
-                    model.fit(X, y)
-                    x_line = np.linspace(X.min(), X.max(), 100).reshape(-1, 1)
-                    y_line = model.predict(x_line)
-                    curve_name = "多项式回归 (2阶)"
-                    curve_color = "blue"
-
-                elif model_type == "多项式回归 (3阶)":
-                    model = Pipeline([
-                        ('poly', PolynomialFeatures(degree=3)),
-                        ('linear', LinearRegression())
-                    ])
-                    model.fit(X, y)
-                    x_line = np.linspace(X.min(), X.max(), 100).reshape(-1, 1)
-                    y_line = model.predict(x_line)
-                    curve_name = "多项式回归 (3阶)"
-                    curve_color = "green"
-
-                elif model_type == "随机森林":
-                    model = RandomForestRegressor(n_estimators=100, random_state=42)
-                    model.fit(X, y)
-                    x_line = np.linspace(X.min(), X.max(), 100).reshape(-1, 1)
-                    y_line = model.predict(x_line)
-                    curve_name = "随机森林"
-                    curve_color = "purple"
+                model, curve_color = build_model(model_type)
+                model.fit(X, y)
+                x_line = np.linspace(X.min(), X.max(), 100).reshape(-1, 1)
+                y_line = model.predict(x_line)
+                curve_name = model_type
 
                 # 添加拟合线到图表
                 fig.add_scatter(
@@ -193,9 +164,7 @@ with tab1:
             # 4. Regression Stats
             if show_trendline and len(chart_df) > 1:
                 y_pred = model.predict(X)
-                r2 = r2_score(y, y_pred)
-                mse = mean_squared_error(y, y_pred)
-                rmse = np.sqrt(mse)
+                r2, mse, rmse = regression_metrics(y, y_pred)
 
                 st.subheader("📈 模型性能分析")
                 c1, c2, c3 = st.columns(3)
@@ -280,7 +249,7 @@ with tab2:
         st.markdown("### 性能参数对比")
         st.info("比较不同无人机的关键性能指标")
 
-        df_calc = load_data("uav_models.json")
+        df_calc = load_data("uav_models.json", columns=ANALYSIS_COLUMNS)
         if not df_calc.empty:
             param1 = st.selectbox("参数1", numeric_cols, index=0, format_func=lambda x: labels.get(x, x), key="calc_param1")
             param2 = st.selectbox("参数2", numeric_cols, index=1, format_func=lambda x: labels.get(x, x), key="calc_param2")
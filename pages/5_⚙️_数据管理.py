@@ -1,6 +1,8 @@
 import streamlit as st
 import os
-from utils import import_excel_data
+import time
+from utils import import_data_files, repair_duplicate_ids, gc_assets, IMPORT_FORMATS
+from jobs import import_jobs, QUEUED, RUNNING, DONE
 
 st.set_page_config(page_title="数据管理", page_icon="⚙️", layout="wide")
 
@@ -30,19 +32,61 @@ with col1:
 
 with col2:
     st.subheader("2. 上传数据")
-    st.markdown("上传填写好的 Excel 文件以更新数据库。")
+    st.markdown("上传填写好的 Excel 文件，或从其他系统导出的 CSV / JSON Lines / Parquet 文件以更新数据库。")
     
-    uploaded_file = st.file_uploader("选择 Excel 文件 (.xlsx)", type=["xlsx"])
-    
-    if uploaded_file is not None:
+    uploaded_files = st.file_uploader("选择数据文件 (.xlsx / .csv / .jsonl / .parquet)",
+                                      type=[ext.lstrip(".") for ext in IMPORT_FORMATS],
+                                      accept_multiple_files=True)
+
+    if uploaded_files:
         if st.button("开始导入", type="primary"):
-            with st.spinner("正在处理数据..."):
-                success, msg = import_excel_data(uploaded_file)
-                if success:
-                    st.success(msg)
-                    st.balloons()
-                else:
-                    st.error(msg)
+            # 导入在后台执行，离开或刷新页面不会中断
+            # 同批文件作为一个任务：并行解析，统一合并
+            files = [(f.name, f.getvalue()) for f in uploaded_files]
+            label = files[0][0] if len(files) == 1 else f"{files[0][0]} 等 {len(files)} 个文件"
+            import_jobs.submit(label, import_data_files, files)
+            st.success(f"已加入导入队列：{len(uploaded_files)} 个文件")
+
+st.divider()
+
+st.subheader("导入任务")
+jobs = import_jobs.list_jobs()
+if not jobs:
+    st.caption("暂无导入任务。")
+for job in jobs:
+    with st.container(border=True):
+        st.markdown(f"**{job['label']}** · 提交于 {job['created_at']:%H:%M:%S}")
+        if job["state"] == QUEUED:
+            st.caption("⏳ 排队中...")
+        elif job["state"] == RUNNING:
+            if job["total"]:
+                st.progress(min(job["processed"] / job["total"], 1.0),
+                            text=f"正在处理 {job['processed']} / {job['total']} 行")
+            else:
+                st.caption(f"正在处理，已完成 {job['processed']} 行")
+        elif job["state"] == DONE:
+            st.success(job["message"] or "导入完成")
+        else:
+            st.error(job["message"] or "导入失败")
+
+st.divider()
+
+st.subheader("3. 数据维护")
+st.markdown("为缺失ID或与其他机型ID重复的记录重新分配唯一ID。")
+if st.button("🔧 修复重复ID"):
+    repaired = repair_duplicate_ids("uav_models.json")
+    if repaired:
+        st.success(f"已为 {repaired} 个机型重新分配ID。")
+    else:
+        st.info("未发现重复或缺失的ID。")
+
+st.markdown("清理不再被任何机型或子系统引用的上传图片。")
+if st.button("🧹 清理未引用图片"):
+    entries, blobs = gc_assets()
+    if entries or blobs:
+        st.success(f"已移除 {entries} 个图片名称、{blobs} 个图片文件。")
+    else:
+        st.info("没有未引用的图片。")
 
 st.divider()
 
@@ -50,5 +94,13 @@ st.info("""
 **💡 说明**:
 - 系统会根据名称自动匹配现有数据。
 - 如果名称已存在，将更新现有记录；如果不存在，将创建新记录。
+- 与上次导入内容相同的行会被跳过，导入结果会显示变更与未变条数。
+- CSV / JSON Lines / Parquet 文件使用与模板相同的表头，每个文件对应一张表；文件名含 `subsystem`/`子系统` 时按子系统导入，含 `uav`/`机型` 时按机型导入，否则根据表头判断。
+- 同时上传多个文件时会并行解析，再统一合并。
 - 请勿修改模板中的表头名称。
 """)
+
+# 有任务在执行时定时刷新进度
+if import_jobs.has_active():
+    time.sleep(1)
+    st.rerun()
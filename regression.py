@@ -0,0 +1,100 @@
+"""Regression methods for the statistics page, with scikit-learn imported on demand."""
+import importlib
+import threading
+
+import numpy as np
+
+# 回归方法注册表: 名称 -> (构造函数, 曲线颜色)
+REGRESSION_MODELS = {}
+
+# warm_up 预加载的 scikit-learn 模块
+BACKEND_MODULES = (
+    "sklearn.linear_model",
+    "sklearn.preprocessing",
+    "sklearn.pipeline",
+    "sklearn.ensemble",
+)
+
+_warm_lock = threading.Lock()
+_warm_thread = None
+
+
+def register(name, color):
+    """Register a factory returning an unfitted estimator under a display name."""
+    def decorator(factory):
+        REGRESSION_MODELS[name] = (factory, color)
+        return factory
+    return decorator
+
+
+def _polynomial(degree):
+    from sklearn.linear_model import LinearRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import PolynomialFeatures
+    return Pipeline([
+        ('poly', PolynomialFeatures(degree=degree)),
+        ('linear', LinearRegression())
+    ])
+
+
+@register("线性回归", "red")
+def linear():
+    from sklearn.linear_model import LinearRegression
+    return LinearRegression()
+
+
+@register("多项式回归 (2阶)", "blue")
+def polynomial_2():
+    return _polynomial(2)
+
+
+@register("多项式回归 (3阶)", "green")
+def polynomial_3():
+    return _polynomial(3)
+
+
+@register("随机森林", "purple")
+def random_forest():
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(n_estimators=100, random_state=42)
+
+
+def build_model(name):
+    """Return (unfitted estimator, curve color) for a registered method."""
+    factory, color = REGRESSION_MODELS[name]
+    return factory(), color
+
+
+def regression_metrics(y, y_pred):
+    """Return (r2, mse, rmse); computed with numpy so sklearn.metrics is never imported."""
+    y = np.asarray(y, dtype=float)
+    y_pred = np.asarray(y_pred, dtype=float)
+    ss_res = float(np.sum((y - y_pred) ** 2))
+    ss_tot = float(np.sum((y - y.mean()) ** 2))
+    mse = ss_res / len(y)
+    # 与 sklearn.metrics.r2_score 一致：常数目标时完全拟合为 1，否则为 0
+    if ss_tot:
+        r2 = 1.0 - ss_res / ss_tot
+    else:
+        r2 = 1.0 if ss_res == 0 else 0.0
+    return r2, mse, float(np.sqrt(mse))
+
+
+def _preload():
+    for module in BACKEND_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            return
+
+
+def warm_up(background=True):
+    """Import the estimator backends, by default once per process in a daemon thread."""
+    global _warm_thread
+    if not background:
+        _preload()
+        return
+    with _warm_lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(target=_preload, name="regression-warm-up", daemon=True)
+            _warm_thread.start()
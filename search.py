@@ -0,0 +1,176 @@
+"""Persistent inverted index for full-text search over models, subsystems and cases."""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import traceback
+from collections import Counter
+
+import storage
+
+INDEX_VERSION = 1
+
+# 写入后延迟落盘（秒）：一段时间内的多次更新合并为一次写文件
+SAVE_DELAY = 2.0
+
+# 中文按相邻两字切分（bigram），英文/数字按词切分
+_CJK_RUN = re.compile(r"[㐀-䶿一-鿿豈-﫿]+")
+_WORD = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+
+
+def tokenize(text):
+    """Split text into lowercase words and CJK character bigrams."""
+    if not text:
+        return []
+    text = str(text).lower()
+    tokens = _WORD.findall(text)
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class SearchIndex:
+    """BM25-ranked inverted index kept in a JSON file.
+
+    Documents are identified by ``"<kind>:<ref>"``. Each document stores a
+    hash of its text, so re-indexing unchanged documents is a no-op and
+    ``sync`` only touches what changed. Updates are persisted with
+    ``save_later``, which coalesces a burst of edits into one file write.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self.docs = {}
+        self.postings = {}
+        self._dirty = False
+        self._timer = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION:
+            self.docs = data["docs"]
+            self.postings = data["postings"]
+
+    def save(self):
+        """Write the index atomically."""
+        with self._lock:
+            raw = storage.dumps_json({"version": INDEX_VERSION, "docs": self.docs, "postings": self.postings})
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(raw)
+        os.replace(tmp_path, self.path)
+
+    def save_later(self, delay=SAVE_DELAY):
+        """Mark the index changed and write it once, delay seconds after the first unsaved change."""
+        with self._lock:
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(delay, self._flush_in_background)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write pending changes now; returns True if anything was written."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return False
+            self._dirty = False
+        try:
+            self.save()
+        except OSError:
+            with self._lock:
+                self._dirty = True
+            raise
+        return True
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except OSError:
+            traceback.print_exc()
+
+    def _remove(self, doc_id):
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return False
+        for term in doc["terms"]:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        return True
+
+    def update(self, kind, ref, title, text):
+        """Index one document; returns False if its text is unchanged."""
+        doc_id = f"{kind}:{ref}"
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            doc = self.docs.get(doc_id)
+            if doc is not None and doc["hash"] == digest and doc["title"] == title:
+                return False
+            self._remove(doc_id)
+            counts = Counter(tokenize(text))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+            self.docs[doc_id] = {"kind": kind, "ref": ref, "title": title, "hash": digest,
+                                 "length": sum(counts.values()), "terms": list(counts)}
+        return True
+
+    def remove(self, kind, ref):
+        """Drop one document; returns True if it was indexed."""
+        with self._lock:
+            return self._remove(f"{kind}:{ref}")
+
+    def sync(self, kind, documents):
+        """Make the documents of one kind match {ref: (title, text)}; returns the number changed."""
+        changed = 0
+        with self._lock:
+            stale = [d["ref"] for d in self.docs.values() if d["kind"] == kind and d["ref"] not in documents]
+            for ref in stale:
+                changed += self.remove(kind, ref)
+            for ref, (title, text) in documents.items():
+                changed += self.update(kind, ref, title, text)
+        return changed
+
+    def search(self, query, kinds=None, limit=20):
+        """Return up to limit hits as dicts with kind, ref, title and score, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self.docs:
+                return []
+            total = len(self.docs)
+            avg_length = sum(d["length"] for d in self.docs.values()) / total or 1.0
+            scores = Counter()
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    doc = self.docs[doc_id]
+                    if kinds is not None and doc["kind"] not in kinds:
+                        continue
+                    norm = self.K1 * (1 - self.B + self.B * doc["length"] / avg_length)
+                    scores[doc_id] += idf * tf * (self.K1 + 1) / (tf + norm)
+            return [{"kind": self.docs[d]["kind"], "ref": self.docs[d]["ref"],
+                     "title": self.docs[d]["title"], "score": score}
+                    for d, score in scores.most_common(limit)]
@@ -0,0 +1,129 @@
+"""Parsing of subsystem key_specs into unit-normalized numbers, and a sorted index over them."""
+import json
+import re
+
+import numpy as np
+
+# 单位 -> (标准单位, 换算系数)
+UNITS = {
+    "mW": ("W", 1e-3), "W": ("W", 1.0), "kW": ("W", 1e3),
+    "mg": ("g", 1e-3), "g": ("g", 1.0), "kg": ("g", 1e3), "t": ("g", 1e6),
+    "N": ("N", 1.0), "kN": ("N", 1e3), "kgf": ("N", 9.80665),
+    "mV": ("V", 1e-3), "V": ("V", 1.0), "kV": ("V", 1e3),
+    "mA": ("A", 1e-3), "A": ("A", 1.0),
+    "mAh": ("mAh", 1.0), "Ah": ("mAh", 1e3),
+    "Wh": ("Wh", 1.0), "kWh": ("Wh", 1e3),
+    "mm": ("m", 1e-3), "cm": ("m", 1e-2), "m": ("m", 1.0), "km": ("m", 1e3),
+    "m/s": ("m/s", 1.0), "km/h": ("m/s", 1 / 3.6),
+    "s": ("s", 1.0), "min": ("s", 60.0), "h": ("s", 3600.0),
+    "Hz": ("Hz", 1.0), "kHz": ("Hz", 1e3), "MHz": ("Hz", 1e6), "GHz": ("Hz", 1e9),
+    "rpm": ("rpm", 1.0),
+    "KV": ("KV", 1.0),
+    "%": ("%", 1.0),
+}
+
+_QUANTITY = re.compile(
+    r"^\s*([-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)\s*(" +
+    "|".join(re.escape(u) for u in sorted(UNITS, key=len, reverse=True)) +
+    r")?\s*$"
+)
+
+SPEC_VALUES_FIELD = "spec_values"
+
+
+def parse_key_specs(value):
+    """Return key_specs as a dict whether it is stored as a dict or a JSON string."""
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str) and value.strip():
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return {}
+        return parsed if isinstance(parsed, dict) else {}
+    return {}
+
+
+def parse_quantity(text):
+    """Parse "500W" or "1.2 kW" style values into (number, standard unit).
+
+    Returns None when the text is not a single number with a known unit.
+    A bare number is returned with an empty unit.
+    """
+    if isinstance(text, bool):
+        return None
+    if isinstance(text, (int, float)):
+        return (float(text), "") if np.isfinite(text) else None
+    if not isinstance(text, str):
+        return None
+    match = _QUANTITY.match(text.replace(",", ""))
+    if not match:
+        return None
+    number, unit = float(match.group(1)), match.group(2)
+    if not unit:
+        return number, ""
+    standard, factor = UNITS[unit]
+    return number * factor, standard
+
+
+def normalize_specs(key_specs):
+    """Map every parseable spec to {"value": number, "unit": standard unit}."""
+    normalized = {}
+    for name, raw in parse_key_specs(key_specs).items():
+        quantity = parse_quantity(raw)
+        if quantity is not None:
+            normalized[str(name)] = {"value": quantity[0], "unit": quantity[1]}
+    return normalized
+
+
+class SpecIndex:
+    """Per (spec, unit) sorted arrays of values and row positions.
+
+    Range queries are two binary searches per spec instead of parsing every
+    key_specs string on every rerun.
+    """
+
+    def __init__(self, size, columns):
+        self.size = size
+        self._columns = columns
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the index from stored spec_values, parsing key_specs for rows that lack them."""
+        stored = df[SPEC_VALUES_FIELD] if SPEC_VALUES_FIELD in df.columns else None
+        raw = df["key_specs"] if "key_specs" in df.columns else None
+        collected = {}
+        for pos in range(len(df)):
+            specs = stored.iat[pos] if stored is not None else None
+            if not isinstance(specs, dict):
+                specs = normalize_specs(raw.iat[pos]) if raw is not None else {}
+            for name, spec in specs.items():
+                collected.setdefault((name, spec["unit"]), []).append((spec["value"], pos))
+
+        columns = {}
+        for key, pairs in collected.items():
+            pairs.sort()
+            columns[key] = (np.array([v for v, _ in pairs], dtype=float),
+                            np.array([p for _, p in pairs], dtype=np.int64))
+        return cls(len(df), columns)
+
+    def specs(self):
+        """Return the indexed (spec, unit) keys, most populated first."""
+        return sorted(self._columns, key=lambda k: (-len(self._columns[k][0]), k))
+
+    def bounds(self, key):
+        """Return (min, max) of one spec."""
+        values = self._columns[key][0]
+        return float(values[0]), float(values[-1])
+
+    def mask(self, ranges):
+        """Return a boolean row mask for {(spec, unit): (low, high)}; rows without a spec fail."""
+        result = np.ones(self.size, dtype=bool)
+        for key, (low, high) in ranges.items():
+            values, positions = self._columns.get(key, (np.empty(0), np.empty(0, dtype=np.int64)))
+            lo = np.searchsorted(values, low, side="left")
+            hi = np.searchsorted(values, high, side="right")
+            hit = np.zeros(self.size, dtype=bool)
+            hit[positions[lo:hi]] = True
+            result &= hit
+        return result
@@ -0,0 +1,767 @@
+"""Storage backends for the catalog datasets (models, subsystems, custom params)."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 数据文件名 -> SQLite 表名
+TABLES = {
+    "uav_models.json": "models",
+    "subsystems.json": "subsystems",
+    "custom_params.json": "custom_params",
+}
+
+# 各表的固定列；未列出的字段存入 extra (JSON)
+SCHEMAS = {
+    "models": [
+        ("id", "TEXT"),
+        ("name", "TEXT"),
+        ("manufacturer", "TEXT"),
+        ("type", "TEXT"),
+        ("image_url", "TEXT"),
+        ("description", "TEXT"),
+        ("length_m", "REAL"),
+        ("wingspan_m", "REAL"),
+        ("height_m", "REAL"),
+        ("mtow_kg", "REAL"),
+        ("empty_weight_kg", "REAL"),
+        ("max_payload_kg", "REAL"),
+        ("max_speed_kmh", "REAL"),
+        ("cruise_speed_kmh", "REAL"),
+        ("range_km", "REAL"),
+        ("endurance_min", "INTEGER"),
+        ("ceiling_m", "INTEGER"),
+        ("purpose", "TEXT"),
+    ],
+    "subsystems": [
+        ("name", "TEXT"),
+        ("manufacturer", "TEXT"),
+        ("category", "TEXT"),
+        ("image_url", "TEXT"),
+        ("description", "TEXT"),
+        ("key_specs", "TEXT"),
+    ],
+}
+INDEXES = {
+    "models": ["id", "name", "type", "manufacturer"],
+    "subsystems": ["name", "category", "manufacturer"],
+}
+# 以 JSON 文本存储的列（列表/字典）
+JSON_FIELDS = {"purpose", "key_specs"}
+
+
+def file_signature(filepath):
+    """Return (mtime_ns, size) for a file, or None if it does not exist."""
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def clean_value(value):
+    """Convert NaN to None and NumPy scalars to plain Python values."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def clean_nan(obj):
+    """Recursively replace NaN values with None."""
+    if isinstance(obj, dict):
+        return {k: clean_nan(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [clean_nan(item) for item in obj]
+    else:
+        return clean_value(obj)
+
+
+def frame_to_records(df):
+    """Convert a DataFrame to a list of dicts with missing cells set to None.
+
+    Masking is done per column by pandas/NumPy; NaN nested inside list/dict
+    cells is left to dumps_json.
+    """
+    names = list(df.columns)
+    columns = [df[col].to_numpy(dtype=object, na_value=None).tolist() for col in names]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def dumps_json(obj, indent=None):
+    """Serialize to UTF-8 JSON bytes with NaN written as null.
+
+    Output is compact unless indent is given. orjson is used when installed;
+    otherwise the standard library runs with allow_nan=False and the object is
+    only walked with clean_nan if a NaN is actually present.
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            pass  # 例如非字符串键，退回标准库
+    separators = (",", ":") if indent is None else None
+    try:
+        text = json.dumps(obj, indent=indent, ensure_ascii=False, separators=separators, allow_nan=False)
+    except ValueError:
+        text = json.dumps(clean_nan(obj), indent=indent, ensure_ascii=False, separators=separators)
+    return text.encode('utf-8')
+
+
+def project(df, columns):
+    """Keep only the requested columns that exist in df (all columns if None)."""
+    if columns is None:
+        return df
+    return df[[col for col in columns if col in df.columns]]
+
+
+class JsonStore:
+    """Original format: each dataset is one JSON file in data_dir.
+
+    Files are written compactly by default; pass indent=2 for the old
+    pretty-printed layout. Either form reads back identically.
+    """
+
+    name = "json"
+
+    def __init__(self, data_dir, indent=None):
+        self.data_dir = data_dir
+        self.indent = indent
+
+    def _path(self, filename):
+        return os.path.join(self.data_dir, filename)
+
+    def _read(self, filename):
+        filepath = self._path(filename)
+        if not os.path.exists(filepath):
+            return []
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write(self, filename, records):
+        # records 须已清理 NaN（见 frame_to_records / clean_nan）
+        with open(self._path(filename), 'wb') as f:
+            f.write(dumps_json(records, self.indent))
+
+    def signature(self, filename):
+        return file_signature(self._path(filename))
+
+    def load(self, filename, columns=None):
+        return project(pd.DataFrame(self._read(filename)), columns)
+
+    def save(self, filename, df):
+        self._write(filename, frame_to_records(df))
+
+    def insert(self, filename, record):
+        records = self._read(filename)
+        records.append(clean_nan(record))
+        self._write(filename, records)
+
+    def update(self, filename, name, record):
+        records = self._read(filename)
+        for i, existing in enumerate(records):
+            if existing.get("name") == name:
+                records[i] = clean_nan(record)
+                break
+        else:
+            raise KeyError(name)
+        self._write(filename, records)
+
+    def delete(self, filename, name):
+        records = self._read(filename)
+        self._write(filename, [r for r in records if r.get("name") != name])
+
+    def upsert(self, filename, records):
+        """Replace records by name (first match) or append them, in one write."""
+        existing = self._read(filename)
+        positions = {}
+        for i, r in enumerate(existing):
+            positions.setdefault(r.get("name"), i)
+        for record in records:
+            record = clean_nan(record)
+            i = positions.get(record.get("name"))
+            if i is None:
+                positions[record.get("name")] = len(existing)
+                existing.append(record)
+            else:
+                existing[i] = record
+        self._write(filename, existing)
+
+    def load_custom_params(self):
+        return self._read("custom_params.json")
+
+    def save_custom_params(self, params):
+        self._write("custom_params.json", clean_nan(params))
+
+
+class JournaledJsonStore(JsonStore):
+    """JSON snapshot plus an append-only JSON-lines mutation log.
+
+    Single-record changes are appended to "<file>.log" and replayed over the
+    snapshot on load. The log's first line records the SHA-256 of the snapshot
+    it applies to, so a log that has already been folded into a newer snapshot
+    is ignored. Once the log passes compact_bytes it is folded into a new
+    snapshot on a background thread.
+    """
+
+    name = "journal"
+
+    def __init__(self, data_dir, indent=None, compact_bytes=256 * 1024):
+        super().__init__(data_dir, indent)
+        self.compact_bytes = compact_bytes
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._compacting = set()
+
+    def _lock(self, filename):
+        with self._locks_guard:
+            return self._locks.setdefault(filename, threading.RLock())
+
+    def _log_path(self, filename):
+        return self._path(filename) + ".log"
+
+    @staticmethod
+    def _replace_file(filepath, data):
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+
+    def _read_snapshot(self, filename):
+        try:
+            with open(self._path(filename), 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            raw = b""
+        records = json.loads(raw) if raw.strip() else []
+        return records, hashlib.sha256(raw).hexdigest()
+
+    def _read_log(self, filename, base):
+        try:
+            with open(self._log_path(filename), 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return []
+        if not lines or json.loads(lines[0]).get("base") != base:
+            return []
+
+        entries = []
+        for line in lines[1:]:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # 崩溃时写了一半的行
+        return entries
+
+    @staticmethod
+    def _apply(records, entry):
+        op = entry["op"]
+        if op == "insert":
+            records.append(entry["record"])
+        elif op == "update":
+            for i, existing in enumerate(records):
+                if existing.get("name") == entry["name"]:
+                    records[i] = entry["record"]
+                    break
+        elif op == "delete":
+            records[:] = [r for r in records if r.get("name") != entry["name"]]
+        elif op == "upsert":
+            name = entry["record"].get("name")
+            for i, existing in enumerate(records):
+                if existing.get("name") == name:
+                    records[i] = entry["record"]
+                    break
+            else:
+                records.append(entry["record"])
+        return records
+
+    def _replay(self, filename):
+        records, base = self._read_snapshot(filename)
+        for entry in self._read_log(filename, base):
+            self._apply(records, entry)
+        return records
+
+    def _write_snapshot(self, filename, records):
+        raw = dumps_json(records, self.indent)
+        self._replace_file(self._path(filename), raw)
+        # 替换快照即为提交点；旧日志的 base 不再匹配，随后换上空日志
+        header = json.dumps({"base": hashlib.sha256(raw).hexdigest()}) + "\n"
+        self._replace_file(self._log_path(filename), header.encode('utf-8'))
+
+    def _append(self, filename, *entries):
+        with self._lock(filename):
+            log_path = self._log_path(filename)
+            if not os.path.exists(log_path):
+                _, base = self._read_snapshot(filename)
+                self._replace_file(log_path, (json.dumps({"base": base}) + "\n").encode('utf-8'))
+            with open(log_path, 'a+b') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")  # 跳过上次崩溃留下的半行
+                f.write("".join(json.dumps(clean_nan(entry), ensure_ascii=False) + "\n"
+                                for entry in entries).encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            log_size = os.path.getsize(log_path)
+
+        if log_size >= self.compact_bytes:
+            self._compact_in_background(filename)
+
+    def _compact_in_background(self, filename):
+        with self._locks_guard:
+            if filename in self._compacting:
+                return
+            self._compacting.add(filename)
+
+        def run():
+            try:
+                self.compact(filename)
+            finally:
+                with self._locks_guard:
+                    self._compacting.discard(filename)
+
+        threading.Thread(target=run, name=f"compact-{filename}", daemon=True).start()
+
+    def compact(self, filename):
+        """Fold the mutation log into a new snapshot."""
+        with self._lock(filename):
+            self._write_snapshot(filename, self._replay(filename))
+
+    def signature(self, filename):
+        return (file_signature(self._path(filename)), file_signature(self._log_path(filename)))
+
+    def load(self, filename, columns=None):
+        with self._lock(filename):
+            return project(pd.DataFrame(self._replay(filename)), columns)
+
+    def save(self, filename, df):
+        with self._lock(filename):
+            self._write_snapshot(filename, frame_to_records(df))
+
+    def insert(self, filename, record):
+        self._append(filename, {"op": "insert", "record": record})
+
+    def update(self, filename, name, record):
+        with self._lock(filename):
+            if not any(r.get("name") == name for r in self._replay(filename)):
+                raise KeyError(name)
+            self._append(filename, {"op": "update", "name": name, "record": record})
+
+    def delete(self, filename, name):
+        self._append(filename, {"op": "delete", "name": name})
+
+    def upsert(self, filename, records):
+        if records:
+            self._append(filename, *({"op": "upsert", "record": r} for r in records))
+
+
+class SqliteStore:
+    """Embedded SQLite database with one row per record and indexed lookup columns.
+
+    On first use each table is seeded from the matching JSON file, so an
+    existing data directory keeps working; export_json writes it back out.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, data_dir, db_name="catalog.db"):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, db_name)
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _transaction(self):
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            with conn:
+                yield conn
+
+    def _connect(self):
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self._create_schema()
+                    self._initialized = True
+        return self._transaction()
+
+    def _create_schema(self):
+        with self._transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            for table, columns in SCHEMAS.items():
+                column_sql = ", ".join(f"{col} {col_type}" for col, col_type in columns)
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (pk INTEGER PRIMARY KEY, {column_sql}, extra TEXT)")
+                for col in INDEXES[table]:
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{col} ON {table}({col})")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS model_custom_values (
+                    model_pk INTEGER NOT NULL REFERENCES models(pk) ON DELETE CASCADE,
+                    param_name TEXT NOT NULL,
+                    value REAL,
+                    unit TEXT,
+                    PRIMARY KEY (model_pk, param_name)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS custom_params (
+                    pk INTEGER PRIMARY KEY,
+                    name TEXT UNIQUE,
+                    unit TEXT,
+                    created_at TEXT
+                )
+            """)
+
+            # 首次使用时从 JSON 文件导入
+            json_store = JsonStore(self.data_dir)
+            for filename, table in TABLES.items():
+                seeded = conn.execute("SELECT 1 FROM meta WHERE name = ?", (table,)).fetchone()
+                if seeded:
+                    continue
+                if table == "custom_params":
+                    self._replace_custom_params(conn, json_store.load_custom_params())
+                else:
+                    self._replace_rows(conn, table, json_store._read(filename))
+                conn.execute("INSERT INTO meta (name, version) VALUES (?, 1)", (table,))
+
+    def _table(self, filename):
+        if filename not in TABLES:
+            raise ValueError(f"未知的数据文件: {filename}")
+        return TABLES[filename]
+
+    @staticmethod
+    def _bump_version(conn, table):
+        conn.execute("UPDATE meta SET version = version + 1 WHERE name = ?", (table,))
+
+    @staticmethod
+    def _encode(table, record):
+        columns = [col for col, _ in SCHEMAS[table]]
+        values = []
+        for col in columns:
+            value = clean_value(record.get(col))
+            if col in JSON_FIELDS and value is not None:
+                value = json.dumps(clean_nan(value), ensure_ascii=False)
+            values.append(value)
+        extra = {k: clean_nan(v) for k, v in record.items()
+                 if k not in columns and k != "custom_params"}
+        extra = {k: v for k, v in extra.items() if v is not None}
+        values.append(json.dumps(extra, ensure_ascii=False) if extra else None)
+        return columns + ["extra"], values
+
+    def _insert_row(self, conn, table, record):
+        columns, values = self._encode(table, record)
+        placeholders = ", ".join("?" for _ in columns)
+        cursor = conn.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", values)
+        if table == "models":
+            self._write_custom_values(conn, cursor.lastrowid, record.get("custom_params"))
+
+    def _update_row(self, conn, table, pk, record):
+        columns, values = self._encode(table, record)
+        assignments = ", ".join(f"{col} = ?" for col in columns)
+        conn.execute(f"UPDATE {table} SET {assignments} WHERE pk = ?", values + [pk])
+        if table == "models":
+            self._write_custom_values(conn, pk, record.get("custom_params"))
+
+    @staticmethod
+    def _write_custom_values(conn, model_pk, custom_params):
+        conn.execute("DELETE FROM model_custom_values WHERE model_pk = ?", (model_pk,))
+        if not isinstance(custom_params, dict):
+            return
+        conn.executemany(
+            "INSERT INTO model_custom_values (model_pk, param_name, value, unit) VALUES (?, ?, ?, ?)",
+            [(model_pk, param_name, clean_value(info.get("value")), info.get("unit"))
+             for param_name, info in custom_params.items() if isinstance(info, dict)]
+        )
+
+    def _replace_rows(self, conn, table, records):
+        conn.execute(f"DELETE FROM {table}")
+        for record in records:
+            self._insert_row(conn, table, record)
+
+    @staticmethod
+    def _replace_custom_params(conn, params):
+        conn.execute("DELETE FROM custom_params")
+        conn.executemany(
+            "INSERT INTO custom_params (name, unit, created_at) VALUES (?, ?, ?)",
+            [(p.get("name"), p.get("unit"), p.get("created_at")) for p in params]
+        )
+
+    def _decode_rows(self, conn, table):
+        rows = conn.execute(f"SELECT * FROM {table} ORDER BY pk").fetchall()
+        custom_values = {}
+        if table == "models":
+            for row in conn.execute("SELECT * FROM model_custom_values ORDER BY rowid"):
+                custom_values.setdefault(row["model_pk"], {})[row["param_name"]] = {
+                    "value": row["value"], "unit": row["unit"]
+                }
+
+        records = []
+        for row in rows:
+            record = {}
+            for col, _ in SCHEMAS[table]:
+                value = row[col]
+                if col in JSON_FIELDS and value is not None:
+                    value = json.loads(value)
+                record[col] = value
+            if row["extra"]:
+                record.update(json.loads(row["extra"]))
+            if table == "models":
+                record["custom_params"] = custom_values.get(row["pk"], {})
+            records.append(record)
+        return records
+
+    def signature(self, filename):
+        table = self._table(filename)
+        with self._connect() as conn:
+            row = conn.execute("SELECT version FROM meta WHERE name = ?", (table,)).fetchone()
+        return row["version"] if row else None
+
+    def load(self, filename, columns=None):
+        table = self._table(filename)
+        with self._connect() as conn:
+            return project(pd.DataFrame(self._decode_rows(conn, table)), columns)
+
+    def save(self, filename, df):
+        table = self._table(filename)
+        with self._connect() as conn:
+            self._replace_rows(conn, table, df.to_dict(orient="records"))
+            self._bump_version(conn, table)
+
+    def insert(self, filename, record):
+        table = self._table(filename)
+        with self._connect() as conn:
+            self._insert_row(conn, table, record)
+            self._bump_version(conn, table)
+
+    def update(self, filename, name, record):
+        table = self._table(filename)
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT pk FROM {table} WHERE name = ? ORDER BY pk LIMIT 1", (name,)).fetchone()
+            if row is None:
+                raise KeyError(name)
+            self._update_row(conn, table, row["pk"], record)
+            self._bump_version(conn, table)
+
+    def delete(self, filename, name):
+        table = self._table(filename)
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {table} WHERE name = ?", (name,))
+            self._bump_version(conn, table)
+
+    def upsert(self, filename, records):
+        """Update records by name (first match) or insert them, in one transaction."""
+        table = self._table(filename)
+        with self._connect() as conn:
+            for record in records:
+                row = conn.execute(f"SELECT pk FROM {table} WHERE name = ? ORDER BY pk LIMIT 1",
+                                   (clean_value(record.get("name")),)).fetchone()
+                if row is None:
+                    self._insert_row(conn, table, record)
+                else:
+                    self._update_row(conn, table, row["pk"], record)
+            self._bump_version(conn, table)
+
+    def load_custom_params(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, unit, created_at FROM custom_params ORDER BY pk").fetchall()
+        return [dict(row) for row in rows]
+
+    def save_custom_params(self, params):
+        with self._connect() as conn:
+            self._replace_custom_params(conn, params)
+            self._bump_version(conn, "custom_params")
+
+    def import_json(self, filename):
+        """Replace a table with the contents of its JSON file in data_dir."""
+        json_store = JsonStore(self.data_dir)
+        if filename == "custom_params.json":
+            self.save_custom_params(json_store.load_custom_params())
+        else:
+            table = self._table(filename)
+            with self._connect() as conn:
+                self._replace_rows(conn, table, json_store._read(filename))
+                self._bump_version(conn, table)
+
+    def export_json(self, filename):
+        """Write a table back to its JSON file in data_dir."""
+        json_store = JsonStore(self.data_dir)
+        if filename == "custom_params.json":
+            json_store.save_custom_params(self.load_custom_params())
+        else:
+            table = self._table(filename)
+            with self._connect() as conn:
+                json_store._write(filename, self._decode_rows(conn, table))
+
+
+class ParquetStore(JsonStore):
+    """Columnar storage for the model and subsystem catalogs (requires pyarrow).
+
+    uav_models.json / subsystems.json are kept as "<name>.parquet" next to the
+    JSON files (seeded from them on first use); custom params stay in JSON.
+    type/manufacturer/category are dictionary-encoded, and each custom
+    parameter becomes its own float column "custom.<name>" with the units in
+    the file metadata, so load(filename, columns=...) reads only what is asked for.
+    A projected load keeps the dictionary columns as pandas categoricals; a
+    full load returns them as plain object columns so the frame can be edited.
+    """
+
+    name = "parquet"
+    COLUMNAR_FILES = {"uav_models.json", "subsystems.json"}
+    CATEGORICAL_COLUMNS = ["type", "manufacturer", "category"]
+    CUSTOM_PREFIX = "custom."
+
+    def __init__(self, data_dir):
+        super().__init__(data_dir)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Parquet 存储后端需要安装 pyarrow: pip install pyarrow") from e
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+
+    def _parquet_path(self, filename):
+        return self._path(os.path.splitext(filename)[0] + ".parquet")
+
+    def _ensure_seeded(self, filename):
+        if not os.path.exists(self._parquet_path(filename)) and os.path.exists(self._path(filename)):
+            self._write_frame(filename, pd.DataFrame(super()._read(filename)))
+
+    def _to_table(self, df):
+        df = df.reset_index(drop=True)
+        units = None
+        if "custom_params" in df.columns:
+            units = {}
+            custom = df.pop("custom_params")
+            for params in custom:
+                if isinstance(params, dict):
+                    for param_name, info in params.items():
+                        if isinstance(info, dict):
+                            units.setdefault(param_name, info.get("unit"))
+            for param_name in units:
+                values = [params[param_name].get("value")
+                          if isinstance(params, dict) and isinstance(params.get(param_name), dict) else None
+                          for params in custom]
+                df[self.CUSTOM_PREFIX + param_name] = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+
+        # 混合类型的对象列（如 dict 形式的 key_specs）以 JSON 文本存储
+        json_columns = []
+        for col in df.columns:
+            if df[col].dtype != object:
+                continue
+            kinds = {type(v) for v in df[col] if clean_value(v) is not None}
+            if kinds and kinds != {str} and kinds != {list}:
+                df[col] = [None if clean_value(v) is None else json.dumps(clean_nan(v), ensure_ascii=False)
+                           for v in df[col]]
+                json_columns.append(col)
+
+        for col in self.CATEGORICAL_COLUMNS:
+            if col in df.columns and col not in json_columns:
+                df[col] = df[col].astype("category")
+
+        table = self._pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        if units is not None:
+            metadata[b"uav_custom_units"] = json.dumps(units, ensure_ascii=False).encode('utf-8')
+        metadata[b"uav_json_columns"] = json.dumps(json_columns).encode('utf-8')
+        return table.replace_schema_metadata(metadata)
+
+    def _from_table(self, table, with_custom_params):
+        metadata = table.schema.metadata or {}
+        units = json.loads(metadata[b"uav_custom_units"]) if b"uav_custom_units" in metadata else None
+        json_columns = json.loads(metadata.get(b"uav_json_columns", b"[]"))
+        list_columns = [field.name for field in table.schema if self._pa.types.is_list(field.type)]
+
+        df = table.to_pandas()
+        for col in json_columns:
+            if col in df.columns:
+                df[col] = [json.loads(v) if isinstance(v, str) else None for v in df[col]]
+        for col in list_columns:
+            df[col] = [list(v) if v is not None else None for v in df[col]]
+
+        custom_columns = [col for col in df.columns if col.startswith(self.CUSTOM_PREFIX)]
+        if with_custom_params and units is not None:
+            names = [col[len(self.CUSTOM_PREFIX):] for col in custom_columns]
+            df["custom_params"] = [
+                {n: {"value": v, "unit": units.get(n)} for n, v in zip(names, row) if pd.notna(v)}
+                for row in df[custom_columns].itertuples(index=False)
+            ] if custom_columns else [{} for _ in range(len(df))]
+            df = df.drop(columns=custom_columns)
+        return df
+
+    def _write_frame(self, filename, df):
+        path = self._parquet_path(filename)
+        tmp_path = path + ".tmp"
+        self._pq.write_table(self._to_table(df), tmp_path)
+        os.replace(tmp_path, path)
+
+    def _read(self, filename):
+        if filename not in self.COLUMNAR_FILES:
+            return super()._read(filename)
+        return self.load(filename).to_dict(orient="records")
+
+    def _write(self, filename, records):
+        if filename not in self.COLUMNAR_FILES:
+            return super()._write(filename, records)
+        self._write_frame(filename, pd.DataFrame(records))
+
+    def signature(self, filename):
+        if filename not in self.COLUMNAR_FILES:
+            return super().signature(filename)
+        self._ensure_seeded(filename)
+        return file_signature(self._parquet_path(filename))
+
+    def load(self, filename, columns=None):
+        if filename not in self.COLUMNAR_FILES:
+            return super().load(filename, columns)
+        self._ensure_seeded(filename)
+        path = self._parquet_path(filename)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+
+        if columns is None:
+            # 完整读取的结果会被编辑后整体保存，分类列还原为 object 以便赋新值
+            df = self._from_table(self._pq.read_table(path), True)
+            categorical = df.select_dtypes("category").columns
+            return df.astype({col: object for col in categorical})
+
+        available = self._pq.read_schema(path).names
+        with_custom_params = "custom_params" in columns
+        physical = [col for col in columns if col in available]
+        if with_custom_params:
+            physical += [col for col in available if col.startswith(self.CUSTOM_PREFIX) and col not in physical]
+        table = self._pq.read_table(path, columns=physical)
+        return project(self._from_table(table, with_custom_params), columns)
+
+    def save(self, filename, df):
+        if filename not in self.COLUMNAR_FILES:
+            return super().save(filename, df)
+        self._write_frame(filename, df)
+
+    def export_json(self, filename):
+        """Write a Parquet catalog back to its JSON file in data_dir."""
+        JsonStore(self.data_dir)._write(filename, self._read(filename))
+
+
+BACKENDS = {
+    JsonStore.name: JsonStore,
+    JournaledJsonStore.name: JournaledJsonStore,
+    SqliteStore.name: SqliteStore,
+    ParquetStore.name: ParquetStore,
+}
@@ -0,0 +1,71 @@
+"""Local stand-in for an OpenAI-compatible chat-completions endpoint."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def reply(content, usage=None):
+    """A 200 chat-completions response whose message content is the given text."""
+    body = {"choices": [{"message": {"content": content}}]}
+    if usage is not None:
+        body["usage"] = usage
+    return 200, {}, body
+
+
+class ChatStub:
+    """Serves queued (status, headers, body) responses, then the default one.
+
+    Requests with ``"stream": true`` get the reply content as server-sent
+    events in chunks of ``stream_chunk`` characters. Every request body is
+    kept in ``requests``.
+    """
+
+    def __init__(self, default=None, stream_chunk=7):
+        self.default = default or reply("{}")
+        self.queue = []
+        self.requests = []
+        self.stream_chunk = stream_chunk
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.requests.append(body)
+                    status, headers, payload = stub.queue.pop(0) if stub.queue else stub.default
+                if status == 200 and body.get("stream"):
+                    return self._stream(payload["choices"][0]["message"]["content"])
+                raw = payload.encode("utf-8") if isinstance(payload, str) else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def _stream(self, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                pieces = [content[i:i + stub.stream_chunk] for i in range(0, len(content), stub.stream_chunk)]
+                events = [json.dumps({"choices": [{"delta": {"content": p}}]}) for p in pieces] + ["[DONE]"]
+                for event in events:
+                    data = f"data: {event}\n\n".encode("utf-8")
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import extraction
+import utils
+from chat_stub import ChatStub
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point utils at an empty data directory and a fresh search index."""
+    monkeypatch.setattr(utils, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(utils, "CASES_DIR", str(tmp_path / "data" / "cases"))
+    monkeypatch.setattr(utils, "ASSETS_DIR", str(tmp_path / "assets"))
+    monkeypatch.setattr(utils, "BLOB_DIR", str(tmp_path / "assets" / "blobs"))
+    monkeypatch.setattr(utils, "ASSET_MANIFEST", str(tmp_path / "assets" / "manifest.json"))
+    monkeypatch.setattr(utils, "SEARCH_INDEX_PATH", str(tmp_path / "cache" / "search_index.json"))
+    monkeypatch.setattr(utils, "_store", None)
+    monkeypatch.setattr(utils, "_search_index", None)
+    monkeypatch.setattr(utils, "_last_id", None)
+    os.makedirs(utils.CASES_DIR)
+    os.makedirs(utils.ASSETS_DIR)
+    utils.invalidate_cache()
+    utils.invalidate_image_paths()
+    yield tmp_path
+    if utils._search_index is not None:
+        utils._search_index.flush()
+    utils.invalidate_cache()
+    utils.invalidate_image_paths()
+
+
+@pytest.fixture
+def chat_stub():
+    stub = ChatStub()
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def extraction_cache(tmp_path, monkeypatch):
+    """Give extraction an empty result cache and no retry backoff."""
+    cache = extraction.ExtractionCache(str(tmp_path / "extraction"))
+    monkeypatch.setattr(extraction, "extraction_cache", cache)
+    monkeypatch.setattr(extraction, "RETRY_BASE_DELAY", 0.0)
+    return cache
@@ -0,0 +1,37 @@
+import io
+import os
+
+import utils
+
+
+class Upload(io.BytesIO):
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+def test_save_asset_deduplicates_and_renames_conflicts(data_dir):
+    assert utils.save_asset(Upload("a.png", b"first")) == "a.png"
+    assert utils.save_asset(Upload("a.png", b"first")) == "a.png"
+    renamed = utils.save_asset(Upload("a.png", b"second"))
+    assert renamed.startswith("a-") and renamed.endswith(".png")
+
+    assert len(os.listdir(utils.BLOB_DIR)) == 2
+    with open(utils.get_image_path(renamed), "rb") as f:
+        assert f.read() == b"second"
+
+
+def test_gc_assets_drops_unreferenced_entries_and_blobs(data_dir, monkeypatch):
+    kept = utils.save_asset(Upload("kept.png", b"kept"))
+    dropped = utils.save_asset(Upload("dropped.png", b"dropped"))
+    utils.insert_record("subsystems.json", {"name": "M1", "category": "Motor", "image_url": kept})
+
+    # 宽限期内的新图片不回收
+    assert utils.gc_assets() == (0, 0)
+
+    monkeypatch.setattr(utils, "ASSET_GC_GRACE", -1)
+    assert utils.gc_assets() == (1, 1)
+    assert set(utils.load_asset_manifest()) == {kept}
+    assert utils.get_image_path(dropped) is None
+    with open(utils.get_image_path(kept), "rb") as f:
+        assert f.read() == b"kept"
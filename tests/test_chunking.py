@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+import extraction
+from chat_stub import reply
+
+CASES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cases")
+
+DOC = """# X-1 设计报告
+## 1. 概述
+- 航程：100 km
+## 2. 指标核对
+| 指标 | 拟定值 | 实际值 |
+|---|---|---|
+| 航程 | 120 km | 110 km |
+## 3. 总结
+- 航程：90 km
+"""
+
+
+def test_chunks_keep_document_order_around_tables():
+    chunks = extraction.split_markdown(DOC)
+    assert [c["table"] for c in chunks] == [False, True, False]
+    assert "## 1. 概述" in chunks[0]["text"]
+    assert "| 航程 | 120 km | 110 km |" in chunks[1]["text"]
+    assert "## 3. 总结" in chunks[2]["text"]
+    # 每块都带上文档标题
+    assert all(c["text"].startswith("# X-1 设计报告") for c in chunks)
+
+
+def test_chunks_of_a_real_case_follow_the_document():
+    with open(os.path.join(CASES_DIR, "无人僚机“玄锋”.md"), encoding="utf-8") as f:
+        content = f.read()
+    lines = content.splitlines()
+    positions = []
+    for chunk in extraction.split_markdown(content):
+        body = [l for l in chunk["text"].splitlines() if l.strip() and not l.startswith("#")]
+        positions.append(lines.index(body[0]))
+    assert positions == sorted(positions)
+
+
+def test_prose_chunks_respect_max_chars():
+    content = "# 标题\n" + "\n".join(f"## 第{i}节\n" + "正文" * 40 for i in range(20))
+    chunks = extraction.split_markdown(content, max_chars=300)
+    assert len(chunks) > 1
+    assert all(len(c["text"]) <= 300 + len("# 标题\n## 第19节\n") for c in chunks)
+    assert sum(c["text"].count("正文" * 40) for c in chunks) == 20
+
+
+@pytest.mark.parametrize("line, field, value", [
+    ("- 航程：1,200 公里", "range_km", 1200.0),
+    ("- 航程：3000 m", "range_km", 3.0),
+    ("- **续航时间**：2 h", "endurance_min", 120),
+    ("- 续航时间：45 分钟", "endurance_min", 45),
+    ("- 最大起飞重量（MTOW）：1.2 t", "mtow_kg", 1200.0),
+    ("- 空重：800 g", "empty_weight_kg", 0.8),
+    ("- 升限：3 km", "ceiling_m", 3000),
+    ("- 最大速度：10 m/s", "max_speed_kmh", 36.0),
+    ("| 总重 | - | 13479 kg | (基准) |", "mtow_kg", 13479.0),
+])
+def test_local_fields_are_converted_to_record_units(line, field, value):
+    assert extraction.parse_local_fields(line) == {field: value}
+
+
+def test_local_fields_ignore_wrong_dimensions_and_unknown_labels():
+    assert extraction.parse_local_fields("- 航程：3 h\n- 推重比：1.34\n- 进气道长度：2 m") == {}
+
+
+def test_later_label_overrides_earlier_within_a_chunk():
+    assert extraction.parse_local_fields("- 空机重量：8000kg\n- 空机重量（最终）：8314 kg") == {"empty_weight_kg": 8314.0}
+
+
+def test_merge_prefers_majority_then_later_partial():
+    data, conflicts = extraction.merge_partials([
+        {"range_km": 3100, "mtow_kg": 10},
+        {"range_km": 3090, "mtow_kg": 10},
+        {"mtow_kg": 12, "ceiling_m": 0},
+    ])
+    assert data["range_km"] == 3090.0
+    assert data["mtow_kg"] == 10.0
+    assert data["ceiling_m"] is None
+    assert conflicts == {"range_km": [3090.0, 3100.0], "mtow_kg": [10.0, 12.0]}
+
+
+def test_merge_text_fields_and_purpose():
+    data, _ = extraction.merge_partials([
+        {"name": "", "type": "Other", "purpose": ["侦察"]},
+        {"name": "X-1", "type": "Fixed-Wing", "purpose": ["侦察", "打击"]},
+        {"name": "X-2", "manufacturer": "Acme", "type": "VTOL"},
+    ])
+    assert (data["name"], data["manufacturer"], data["type"]) == ("X-1", "Acme", "Fixed-Wing")
+    assert data["purpose"] == ["侦察", "打击"]
+
+
+def test_extract_chunked_parses_tables_locally(chat_stub, extraction_cache):
+    chat_stub.default = reply('{"name": "X-1", "manufacturer": "Acme", "range_km": 100}')
+    result = extraction.extract_chunked(DOC, "OpenAI", "key", "model", chat_stub.url)
+
+    assert (result["chunks"], result["local_chunks"]) == (3, 1)
+    assert len(chat_stub.requests) == result["attempts"] == 2
+    assert all("| 航程 |" not in r["messages"][-1]["content"] for r in chat_stub.requests)
+    # 100 km 得三票（两块的AI结果与第一块的本地解析），胜过表格 110 km 与总结 90 km
+    assert result["data"]["range_km"] == 100.0
+    assert result["data"]["name"] == "X-1"
@@ -0,0 +1,183 @@
+import json
+import time
+
+import pytest
+
+import extraction
+import utils
+from chat_stub import reply
+
+
+def test_http_error_with_string_error_body_raises_api_error(chat_stub):
+    chat_stub.queue.append((401, {}, {"error": "invalid api key"}))
+    with pytest.raises(extraction.APIError) as info:
+        extraction.get_client(chat_stub.url).chat([], "key", "model")
+    assert info.value.status == 401
+    assert not info.value.retryable
+    assert "invalid api key" in str(info.value)
+
+
+@pytest.mark.parametrize("body", [{"error": {"message": "bad model"}}, ["not", "an", "object"], "plain text"])
+def test_http_error_bodies_all_become_api_error(chat_stub, body):
+    chat_stub.queue.append((400, {}, body))
+    with pytest.raises(extraction.APIError) as info:
+        extraction.get_client(chat_stub.url).chat([], "key", "model")
+    assert info.value.status == 400
+
+
+def test_chat_records_usage(chat_stub):
+    chat_stub.default = reply("hello", usage={"prompt_tokens": 10, "completion_tokens": 2})
+    client = extraction.LLMClient(chat_stub.url)
+    assert client.chat([], "key", "model") == "hello"
+    stats = client.stats()
+    assert (stats["calls"], stats["errors"], stats["prompt_tokens"], stats["completion_tokens"]) == (1, 0, 10, 2)
+
+
+MODEL = {"name": "X-1", "manufacturer": "Acme", "type": "VTOL", "mtow_kg": 12.5, "purpose": ["侦察", "测绘"]}
+
+
+def _model_reply(data=MODEL):
+    return reply(json.dumps(data, ensure_ascii=False))
+
+
+def test_extract_with_retries_honours_retry_after_then_caches(chat_stub, extraction_cache):
+    chat_stub.default = _model_reply()
+    chat_stub.queue.append((429, {"Retry-After": "0.2"}, {"error": {"message": "rate limited"}}))
+
+    start = time.monotonic()
+    data, attempts = extraction.extract_with_retries("案例", "OpenAI", "key", "model", chat_stub.url)
+    assert time.monotonic() - start >= 0.2
+    assert (data, attempts) == (MODEL, 2)
+    assert len(chat_stub.requests) == 2
+
+    assert extraction.extract_with_retries("案例", "OpenAI", "key", "model", chat_stub.url) == (MODEL, 0)
+    assert len(chat_stub.requests) == 2
+
+    data, attempts = extraction.extract_with_retries("案例", "OpenAI", "key", "model", chat_stub.url,
+                                                     force_refresh=True)
+    assert attempts == 1 and len(chat_stub.requests) == 3
+
+
+def test_extract_with_retries_gives_up_on_client_errors(chat_stub, extraction_cache):
+    chat_stub.default = (400, {}, {"error": {"message": "bad request"}})
+    with pytest.raises(extraction.APIError):
+        extraction.extract_with_retries("案例", "OpenAI", "key", "model", chat_stub.url)
+    assert len(chat_stub.requests) == 1
+
+
+def test_extract_with_retries_stops_after_max_retries(chat_stub, extraction_cache):
+    chat_stub.default = (503, {}, {"error": {"message": "unavailable"}})
+    with pytest.raises(extraction.APIError) as info:
+        extraction.extract_with_retries("案例", "OpenAI", "key", "model", chat_stub.url, retries=2)
+    assert info.value.status == 503
+    assert len(chat_stub.requests) == 3
+
+
+def test_extract_with_retries_gives_up_on_long_retry_after(chat_stub, extraction_cache, monkeypatch):
+    chat_stub.default = _model_reply()
+    chat_stub.queue.append((429, {"Retry-After": "3600"}, {"error": {"message": "quota exhausted"}}))
+    monkeypatch.setattr(extraction.time, "sleep", lambda s: pytest.fail(f"slept {s}s"))
+    with pytest.raises(extraction.APIError) as info:
+        extraction.extract_with_retries("案例", "OpenAI", "key", "model", chat_stub.url)
+    assert info.value.retry_after == 3600
+    assert len(chat_stub.requests) == 1
+
+
+def test_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(extraction, "RETRY_BASE_DELAY", 1.0)
+    error = extraction.APIError("unavailable", status=503)
+    assert extraction._retry_delay(error, 10) == extraction.RETRY_MAX_DELAY
+    assert extraction._retry_delay(extraction.APIError("", 429, "2"), 0) == 2.0
+
+
+def test_extract_batch_builds_review_queue_in_order(data_dir, chat_stub, extraction_cache):
+    for name in ("a", "b", "c"):
+        utils.save_case_file(name, f"# 案例 {name}")
+    chat_stub.default = _model_reply()
+    chat_stub.queue.append((400, {}, {"error": {"message": "bad request"}}))
+    cases = [c for c in utils.get_case_files()] + [{"name": "missing", "filename": "missing.md"}]
+    seen = []
+
+    queue = extraction.extract_batch(cases, "OpenAI", "key", "model", chat_stub.url, max_workers=1,
+                                     progress=lambda done, total: seen.append((done, total)))
+
+    assert [r["case"] for r in queue] == [c["name"] for c in cases]
+    assert queue[0]["data"] is None and "HTTP 400" in queue[0]["error"]
+    assert [r["data"] for r in queue[1:3]] == [MODEL, MODEL]
+    assert queue[3]["data"] is None and queue[3]["error"]
+    assert seen[0] == (0, 4) and seen[-1] == (4, 4)
+
+
+def test_stream_extract_yields_fields_and_shares_the_cache(chat_stub, extraction_cache):
+    chat_stub.default = _model_reply()
+    pairs = list(extraction.stream_extract("案例", "OpenAI", "key", "model", chat_stub.url))
+    assert pairs == list(MODEL.items())
+    assert chat_stub.requests[-1]["stream"] is True
+
+    assert extraction.extract_with_retries("案例", "OpenAI", "key", "model", chat_stub.url) == (MODEL, 0)
+    assert list(extraction.stream_extract("案例", "OpenAI", "key", "model", chat_stub.url)) == pairs
+    assert len(chat_stub.requests) == 1
+
+
+def test_stream_extract_aborts_on_malformed_reply(chat_stub, extraction_cache):
+    chat_stub.default = reply('{"name": "X-1", "mtow_kg": 12.5 oops}')
+    stream = extraction.stream_extract("案例", "OpenAI", "key", "model", chat_stub.url)
+    assert next(stream) == ("name", "X-1")
+    with pytest.raises(ValueError):
+        list(stream)
+    assert extraction_cache.get(extraction.ExtractionCache.key("案例", "OpenAI", "model", chat_stub.url)) is None
+
+@pytest.mark.parametrize("name, value", [("SYSTEM_PROMPT", "另一个系统提示"), ("PROMPT_TEMPLATE", "{markdown_content}"),
+                                         ("CHAT_TEMPERATURE", 0.0), ("CHAT_MAX_TOKENS", 4000)])
+def test_cache_key_covers_prompts_and_sampling(monkeypatch, name, value):
+    before = extraction.ExtractionCache.key("案例", "OpenAI", "model")
+    monkeypatch.setattr(extraction, name, value)
+    assert extraction.ExtractionCache.key("案例", "OpenAI", "model") != before
+
+
+def test_sampling_parameters_are_sent(chat_stub, extraction_cache, monkeypatch):
+    monkeypatch.setattr(extraction, "CHAT_TEMPERATURE", 0.0)
+    chat_stub.default = _model_reply()
+    extraction.extract_with_retries("案例", "OpenAI", "key", "model", chat_stub.url)
+    list(extraction.stream_extract("案例", "OpenAI", "key", "model", chat_stub.url, force_refresh=True))
+    assert [(r["temperature"], r["max_tokens"]) for r in chat_stub.requests] == [(0.0, 2000)] * 2
+
+
+def test_stream_error_carries_the_response_body(chat_stub, extraction_cache):
+    chat_stub.queue.append((401, {}, {"error": {"message": "invalid api key"}}))
+    with pytest.raises(extraction.APIError) as info:
+        list(extraction.stream_extract("案例", "OpenAI", "key", "model", chat_stub.url))
+    assert info.value.status == 401
+    assert "invalid api key" in str(info.value)
+    assert len(chat_stub.requests) == 1
+
+
+def test_stream_extract_retries_rate_limited_connection(chat_stub, extraction_cache):
+    chat_stub.default = _model_reply()
+    chat_stub.queue.append((429, {"Retry-After": "0.2"}, {"error": {"message": "rate limited"}}))
+
+    start = time.monotonic()
+    pairs = list(extraction.stream_extract("案例", "OpenAI", "key", "model", chat_stub.url))
+    assert time.monotonic() - start >= 0.2
+    assert pairs == list(MODEL.items())
+    assert len(chat_stub.requests) == 2
+
+
+def test_stream_extract_stops_after_max_retries(chat_stub, extraction_cache):
+    chat_stub.default = (503, {}, {"error": {"message": "unavailable"}})
+    with pytest.raises(extraction.APIError) as info:
+        list(extraction.stream_extract("案例", "OpenAI", "key", "model", chat_stub.url, retries=1))
+    assert "unavailable" in str(info.value)
+    assert len(chat_stub.requests) == 2
+
+
+
+@pytest.mark.parametrize("size", [1, 3, 16, 1000])
+def test_incremental_parser_matches_json_loads(size):
+    text = '前言 {"a": "x\\"}{", "b": [1, {"c": null}], "d": -1.5e3, "e": true}'
+    parser = extraction.IncrementalJSONParser()
+    pairs = []
+    for i in range(0, len(text), size):
+        pairs.extend(parser.feed(text[i:i + size]))
+    assert parser.done
+    assert dict(pairs) == parser.result == json.loads(text[text.index("{"):])
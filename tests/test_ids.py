@@ -0,0 +1,56 @@
+import threading
+import time
+
+import utils
+
+
+def _suffix(uav_id):
+    return int(uav_id.split("-")[1])
+
+
+def test_blocks_are_consecutive_and_increasing(data_dir):
+    first = utils.allocate_ids(3)
+    second = utils.allocate_ids(2)
+    numbers = [_suffix(i) for i in first + second]
+    assert numbers[:3] == list(range(numbers[0], numbers[0] + 3))
+    assert numbers == sorted(numbers) and len(set(numbers)) == 5
+    assert numbers[0] >= int(time.time() * 1000) - 60_000
+
+
+def test_concurrent_allocations_never_collide(data_dir):
+    allocated = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(50):
+            block = utils.allocate_ids(20)
+            with lock:
+                allocated.extend(block)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(allocated)) == len(allocated) == 8 * 50 * 20
+
+
+def test_restart_seeds_from_largest_stored_id(data_dir, monkeypatch):
+    # 上次运行的大批量导入预留了远超当前时间的编号
+    future = int(time.time() * 1000) + 10_000_000
+    utils.insert_record("uav_models.json", {"id": f"uav-{future}", "name": "X-1"})
+    utils.insert_record("uav_models.json", {"id": "legacy-7", "name": "X-2"})
+
+    monkeypatch.setattr(utils, "_last_id", None)
+    assert [_suffix(i) for i in utils.allocate_ids(2)] == [future + 1, future + 2]
+
+
+def test_repair_duplicate_ids_rekeys_repeats_and_missing(data_dir):
+    for uav_id, name in (("uav-1", "A"), ("uav-1", "B"), (None, "C"), ("uav-2", "D")):
+        utils.insert_record("uav_models.json", {"id": uav_id, "name": name})
+
+    assert utils.repair_duplicate_ids() == 2
+    ids = utils.load_data("uav_models.json").set_index("name")["id"]
+    assert ids["A"] == "uav-1" and ids["D"] == "uav-2"
+    assert ids.is_unique and ids.notna().all()
+    assert utils.repair_duplicate_ids() == 0
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import images
+
+
+class ImageServer:
+    """Serves files from a dict with an ETag, answering If-None-Match with 304."""
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                if self.path not in server.files:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, etag = server.files[self.path]
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def image_server():
+    server = ImageServer()
+    yield server
+    server.close()
+
+
+def test_failed_fetch_backs_off_before_retrying(tmp_path, image_server):
+    cache = images.RemoteImageCache(str(tmp_path), miss_ttl=0.2, max_miss_ttl=0.3)
+    url = image_server.url + "/missing.png"
+
+    assert cache.fetch(url) == url
+    assert cache.fetch(url) == url
+    assert len(image_server.requests) == 1
+
+    time.sleep(0.25)
+    image_server.files["/missing.png"] = (b"png", '"v1"')
+    path = cache.fetch(url)
+    assert path != url and open(path, "rb").read() == b"png"
+    assert len(image_server.requests) == 2
+
+
+def test_failed_revalidation_keeps_stale_copy_without_refetching(tmp_path, image_server):
+    cache = images.RemoteImageCache(str(tmp_path), revalidate_after=0)
+    url = image_server.url + "/a.png"
+    image_server.files["/a.png"] = (b"png", '"v1"')
+    path = cache.fetch(url)
+
+    del image_server.files["/a.png"]
+    assert cache.fetch(url) == path
+    assert cache.fetch(url) == path
+    assert len(image_server.requests) == 2
+
+
+def test_fresh_copy_is_served_from_disk(tmp_path, image_server):
+    cache = images.RemoteImageCache(str(tmp_path))
+    url = image_server.url + "/a.png"
+    image_server.files["/a.png"] = (b"png", '"v1"')
+
+    path = cache.fetch(url)
+    assert path.endswith(".png") and open(path, "rb").read() == b"png"
+    assert cache.fetch(url) == path
+    assert len(image_server.requests) == 1
+
+
+def test_stale_copy_is_revalidated_with_etag(tmp_path, image_server):
+    cache = images.RemoteImageCache(str(tmp_path), revalidate_after=0)
+    url = image_server.url + "/a.png"
+    image_server.files["/a.png"] = (b"png", '"v1"')
+    path = cache.fetch(url)
+
+    # 未变：条件请求返回 304，保留原文件
+    assert cache.fetch(url) == path
+    assert image_server.requests[-1][1].get("If-None-Match") == '"v1"'
+    assert open(path, "rb").read() == b"png"
+
+    # 已变：返回 200，替换为新内容
+    image_server.files["/a.png"] = (b"png-v2", '"v2"')
+    assert cache.fetch(url) == path
+    assert open(path, "rb").read() == b"png-v2"
+    assert len(image_server.requests) == 3
+
+
+def test_least_recently_used_files_are_evicted(tmp_path, image_server):
+    cache = images.RemoteImageCache(str(tmp_path), max_bytes=250)
+    for name in ("a", "b", "c"):
+        image_server.files[f"/{name}.png"] = (name.encode() * 100, f'"{name}"')
+
+    a = cache.fetch(image_server.url + "/a.png")
+    time.sleep(0.02)
+    b = cache.fetch(image_server.url + "/b.png")
+    time.sleep(0.02)
+    assert cache.fetch(image_server.url + "/a.png") == a  # 命中缓存，刷新 a 的使用时间
+    time.sleep(0.02)
+    c = cache.fetch(image_server.url + "/c.png")
+
+    assert os.path.exists(a) and os.path.exists(c)
+    assert not os.path.exists(b) and not os.path.exists(b + ".json")
+
+
+def test_oversized_image_is_not_cached(tmp_path, image_server):
+    cache = images.RemoteImageCache(str(tmp_path), max_file_bytes=10)
+    url = image_server.url + "/big.png"
+    image_server.files["/big.png"] = (b"x" * 100, '"big"')
+    assert cache.fetch(url) == url
+    assert not any(name.endswith(".png") for name in os.listdir(tmp_path))
@@ -0,0 +1,62 @@
+import io
+import json
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import utils
+
+
+def _import_csv(name, text):
+    ok, message = utils.import_data_files([(name, text.encode("utf-8"))])
+    assert ok, message
+
+
+def test_reimport_with_blank_key_specs_keeps_spec_values(data_dir):
+    _import_csv("subsystems.csv", 'name,manufacturer,category,key_specs\n'
+                                  'M1,Acme,Motor,"{""Power"":""600W""}"\n')
+    _import_csv("subsystems.csv", "name,manufacturer,category,key_specs\n"
+                                  "M1,Acme,Propulsion,\n")
+
+    record = utils.load_data("subsystems.json").iloc[0]
+    assert record["category"] == "Propulsion"
+    assert json.loads(record["key_specs"]) == {"Power": "600W"}
+    assert record["spec_values"] == {"Power": {"value": 600.0, "unit": "W"}}
+
+    index = utils.load_spec_index()
+    assert index.mask({("Power", "W"): (500.0, 700.0)}).tolist() == [True]
+
+
+def _workbook(rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "UAVs"
+    sheet.append(["name", "manufacturer", "type", "mtow_kg"])
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _import_workbook(data):
+    ok, message = utils.import_excel_data(io.BytesIO(data))
+    assert ok, message
+    return message
+
+
+@pytest.mark.parametrize("rows", [
+    [["A1", "Acme", "VTOL", 1.0], ["A2", "m", "VTOL", 2.0]],
+    [["A1", "Acme", "VTOL", 1.0], ["A2", "m", "VTOL", 2.0], ["A2", "m2", None, 3.0]],
+], ids=["unique", "duplicate-names"])
+def test_reimporting_an_identical_workbook_is_a_no_op(data_dir, rows):
+    data = _workbook(rows)
+    _import_workbook(data)
+    first = utils.load_data("uav_models.json")
+    assert first.set_index("name").loc["A2", ["manufacturer", "mtow_kg"]].tolist() == [rows[-1][1], rows[-1][3]]
+
+    for _ in range(2):
+        message = _import_workbook(data)
+        assert "机型：0 条变更 / 2 条未变" in message
+        pd.testing.assert_frame_equal(utils.load_data("uav_models.json"), first)
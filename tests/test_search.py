@@ -0,0 +1,47 @@
+import json
+
+import search
+import utils
+
+
+def test_edits_are_persisted_in_one_deferred_write(data_dir, monkeypatch):
+    saves = []
+    monkeypatch.setattr(search.SearchIndex, "save", lambda self: saves.append(len(self.docs)))
+
+    utils.get_search_index()
+    for i in range(20):
+        utils.insert_record("uav_models.json", {"name": f"X-{i}", "manufacturer": "Acme", "type": "VTOL"})
+    utils.update_record("uav_models.json", "X-0", {"name": "X-0", "manufacturer": "Acme", "type": "Other"})
+    utils.delete_record("uav_models.json", "X-1")
+    assert saves == []
+
+    assert utils.get_search_index().flush()
+    assert saves == [19]
+    assert not utils.get_search_index().flush()
+
+
+def test_flushed_index_is_reloaded_from_disk(data_dir):
+    utils.insert_record("subsystems.json", {"name": "M1", "category": "电机", "description": "高效无刷电机"})
+    utils.get_search_index().flush()
+
+    with open(utils.SEARCH_INDEX_PATH, encoding="utf-8") as f:
+        assert "subsystem:M1" in json.load(f)["docs"]
+    reloaded = search.SearchIndex(utils.SEARCH_INDEX_PATH)
+    assert [hit["ref"] for hit in reloaded.search("无刷电机")] == ["M1"]
+
+
+def test_indexing_failure_does_not_fail_the_write(data_dir, monkeypatch):
+    utils.get_search_index()
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("index unavailable")
+
+    with monkeypatch.context() as m:
+        m.setattr(search.SearchIndex, "update", broken)
+        utils.insert_record("uav_models.json", {"name": "X-1", "manufacturer": "Acme", "type": "VTOL"})
+        utils.save_case_file("玄锋", "# 玄锋 无人僚机")
+
+    assert list(utils.load_data("uav_models.json")["name"]) == ["X-1"]
+    # 失败后丢弃内存索引，下次检索时与数据重新同步
+    assert {hit["ref"] for hit in utils.search_all("Acme")} == {"X-1"}
+    assert {hit["ref"] for hit in utils.search_all("僚机")} == {"玄锋.md"}
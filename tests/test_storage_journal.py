@@ -0,0 +1,89 @@
+import json
+import time
+
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = storage.JsonStore(str(tmp_path))
+    store._write("uav_models.json", [{"name": "A", "range_km": 1.0}, {"name": "B", "range_km": 2.0}])
+    return storage.JournaledJsonStore(str(tmp_path))
+
+
+def _names(store):
+    return store.load("uav_models.json")["name"].tolist()
+
+
+def _log_lines(tmp_path):
+    return (tmp_path / "uav_models.json.log").read_text(encoding="utf-8").splitlines()
+
+
+def test_changes_are_logged_and_replayed(store, tmp_path):
+    snapshot = (tmp_path / "uav_models.json").read_bytes()
+    store.insert("uav_models.json", {"name": "C", "range_km": 3.0})
+    store.update("uav_models.json", "A", {"name": "A", "range_km": 10.0})
+    store.delete("uav_models.json", "B")
+    store.upsert("uav_models.json", [{"name": "C", "range_km": 30.0}, {"name": "D"}])
+
+    # 快照不变，变更只追加到日志
+    assert (tmp_path / "uav_models.json").read_bytes() == snapshot
+    assert len(_log_lines(tmp_path)) == 1 + 5
+
+    df = storage.JournaledJsonStore(str(tmp_path)).load("uav_models.json").set_index("name")
+    assert df.index.tolist() == ["A", "C", "D"]
+    assert df.loc["A", "range_km"] == 10.0 and df.loc["C", "range_km"] == 30.0
+
+
+def test_update_unknown_name_raises(store, tmp_path):
+    with pytest.raises(KeyError):
+        store.update("uav_models.json", "missing", {"name": "missing"})
+    assert not (tmp_path / "uav_models.json.log").exists()
+
+
+def test_log_for_another_snapshot_is_ignored(store, tmp_path):
+    store.insert("uav_models.json", {"name": "C"})
+    # 快照被其他途径替换后，旧日志的 base 不再匹配
+    storage.JsonStore(str(tmp_path))._write("uav_models.json", [{"name": "Z"}])
+    assert _names(store) == ["Z"]
+
+
+def test_torn_last_line_is_skipped(store, tmp_path):
+    store.insert("uav_models.json", {"name": "C"})
+    with open(tmp_path / "uav_models.json.log", "a", encoding="utf-8") as f:
+        f.write('{"op": "insert", "record": {"na')
+    assert _names(store) == ["A", "B", "C"]
+
+    # 之后的追加另起一行，不会与半行拼在一起
+    store.insert("uav_models.json", {"name": "D"})
+    assert _names(store) == ["A", "B", "C", "D"]
+
+
+def test_compact_folds_log_into_snapshot(store, tmp_path):
+    store.insert("uav_models.json", {"name": "C"})
+    store.delete("uav_models.json", "A")
+    store.compact("uav_models.json")
+
+    assert [r["name"] for r in json.loads((tmp_path / "uav_models.json").read_text(encoding="utf-8"))] == ["B", "C"]
+    assert len(_log_lines(tmp_path)) == 1
+    assert _names(store) == ["B", "C"]
+
+    store.insert("uav_models.json", {"name": "D"})
+    assert _names(storage.JournaledJsonStore(str(tmp_path))) == ["B", "C", "D"]
+
+
+def test_large_log_is_compacted_in_background(tmp_path):
+    store = storage.JournaledJsonStore(str(tmp_path), compact_bytes=200)
+    for i in range(10):
+        store.insert("uav_models.json", {"name": f"X-{i}", "description": "x" * 50})
+
+    deadline = time.time() + 5
+    while store._compacting and time.time() < deadline:
+        time.sleep(0.01)
+    # 至少有一次压缩已把早先的记录并入快照
+    snapshot = json.loads((tmp_path / "uav_models.json").read_text(encoding="utf-8"))
+    assert snapshot[0]["name"] == "X-0"
+    assert len(_log_lines(tmp_path)) < 1 + 10
+    assert _names(store) == [f"X-{i}" for i in range(10)]
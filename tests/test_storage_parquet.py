@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import storage
+
+pytest.importorskip("pyarrow")
+
+REPO_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+@pytest.fixture
+def store(tmp_path):
+    for filename in storage.TABLES:
+        shutil.copy(os.path.join(REPO_DATA, filename), tmp_path / filename)
+    return storage.ParquetStore(str(tmp_path))
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_seeds_from_checked_in_json(store, tmp_path):
+    expected = _read_json(tmp_path / "uav_models.json")
+    records = storage.frame_to_records(store.load("uav_models.json"))
+    assert os.path.exists(tmp_path / "uav_models.parquet")
+    assert [r["name"] for r in records] == [r["name"] for r in expected]
+    for record, original in zip(records, expected):
+        for key, value in original.items():
+            if key == "custom_params":
+                value = value or {}
+            assert record[key] == value, key
+
+
+def test_custom_params_are_flattened_and_restored(store, tmp_path):
+    store.insert("uav_models.json", {"name": "X-9", "custom_params": {"续航": {"value": 1.5, "unit": "h"}}})
+
+    schema = store._pq.read_schema(tmp_path / "uav_models.parquet")
+    assert {"custom.翼载荷", "custom.推重比", "custom.续航"} <= set(schema.names)
+    assert "custom_params" not in schema.names
+    assert json.loads(schema.metadata[b"uav_custom_units"])["续航"] == "h"
+
+    params = store.load("uav_models.json").set_index("name")["custom_params"]
+    assert params["X-9"] == {"续航": {"value": 1.5, "unit": "h"}}
+    assert params["玄峰无人僚机"] == {"翼载荷": {"value": 300.0, "unit": "kg/m2"},
+                                   "推重比": {"value": 1.2, "unit": "无量纲"}}
+
+
+def test_projection_reads_only_requested_columns(store):
+    df = store.load("uav_models.json", columns=["name", "range_km"])
+    assert list(df.columns) == ["name", "range_km"]
+
+    df = store.load("uav_models.json", columns=["name", "custom_params"])
+    assert list(df.columns) == ["name", "custom_params"]
+    assert df.set_index("name").loc["玄峰无人僚机", "custom_params"]["推重比"]["value"] == 1.2
+
+
+def test_mixed_object_columns_round_trip_as_json(store, tmp_path):
+    store.save("subsystems.json", pd.DataFrame([
+        {"name": "M-1", "key_specs": {"Power": "500W"}},
+        {"name": "M-2", "key_specs": "plain text"},
+        {"name": "M-3", "key_specs": None},
+    ]))
+    schema = store._pq.read_schema(tmp_path / "subsystems.parquet")
+    assert json.loads(schema.metadata[b"uav_json_columns"]) == ["key_specs"]
+
+    specs = store.load("subsystems.json")["key_specs"].tolist()
+    assert specs == [{"Power": "500W"}, "plain text", None]
+
+
+def test_full_load_returns_editable_object_columns(store):
+    assert isinstance(store.load("uav_models.json", columns=["type"])["type"].dtype, pd.CategoricalDtype)
+
+    df = store.load("uav_models.json")
+    assert df["type"].dtype == object and df["manufacturer"].dtype == object
+    df.loc[0, "type"] = "VTOL"
+    store.save("uav_models.json", df)
+    assert store.load("uav_models.json")["type"].tolist()[0] == "VTOL"
@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import storage
+
+REPO_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _assert_contains(record, expected):
+    """record holds every field of expected; SQLite also returns unset schema columns as None."""
+    for key, value in expected.items():
+        if key == "custom_params" and value is None:
+            value = {}  # 没有自定义参数的机型读回为空字典
+        assert record[key] == value, key
+
+
+@pytest.fixture
+def store(tmp_path):
+    for filename in storage.TABLES:
+        shutil.copy(os.path.join(REPO_DATA, filename), tmp_path / filename)
+    return storage.SqliteStore(str(tmp_path))
+
+
+@pytest.mark.parametrize("filename", ["uav_models.json", "subsystems.json"])
+def test_seeds_from_checked_in_json(store, tmp_path, filename):
+    expected = _read_json(tmp_path / filename)
+    records = storage.frame_to_records(store.load(filename))
+    assert len(records) == len(expected)
+    for record, original in zip(records, expected):
+        _assert_contains(record, original)
+
+
+def test_seeds_custom_params(store, tmp_path):
+    assert store.load_custom_params() == _read_json(tmp_path / "custom_params.json")
+
+
+def test_seeding_happens_once(store, tmp_path):
+    store.load("uav_models.json")
+    (tmp_path / "uav_models.json").write_text("[]", encoding="utf-8")
+    assert len(store.load("uav_models.json")) == 2
+    # 新实例读取同一个数据库，也不会再次导入
+    assert len(storage.SqliteStore(str(tmp_path)).load("uav_models.json")) == 2
+
+
+def test_custom_params_round_trip_through_value_table(store, tmp_path):
+    params = {"续航": {"value": 1.5, "unit": "h"}, "翼载荷": {"value": 220.0, "unit": "kg/m2"}}
+    store.insert("uav_models.json", {"id": "uav-9", "name": "X-9", "custom_params": params})
+    df = store.load("uav_models.json").set_index("name")
+    assert df.loc["X-9", "custom_params"] == params
+
+    store.update("uav_models.json", "X-9", {"id": "uav-9", "name": "X-9",
+                                              "custom_params": {"续航": {"value": 2.0, "unit": "h"}}})
+    df = store.load("uav_models.json").set_index("name")
+    assert df.loc["X-9", "custom_params"] == {"续航": {"value": 2.0, "unit": "h"}}
+
+    store.delete("uav_models.json", "X-9")
+    with sqlite3.connect(store.path) as conn:
+        # 删除机型时级联删除其自定义参数值
+        seeded = sum(len(r["custom_params"] or {}) for r in _read_json(tmp_path / "uav_models.json"))
+        assert conn.execute("SELECT COUNT(*) FROM model_custom_values").fetchone()[0] == seeded
+
+
+def test_unknown_fields_spill_into_extra(store):
+    record = {"id": "uav-9", "name": "X-9", "content_hash": "abc",
+              "spec_values": {"range_km": 100.0}, "notes": None}
+    store.insert("uav_models.json", record)
+    with sqlite3.connect(store.path) as conn:
+        extra = conn.execute("SELECT extra FROM models WHERE name = 'X-9'").fetchone()[0]
+    assert json.loads(extra) == {"content_hash": "abc", "spec_values": {"range_km": 100.0}}
+
+    loaded = storage.frame_to_records(store.load("uav_models.json"))[-1]
+    assert loaded["content_hash"] == "abc"
+    assert loaded["spec_values"] == {"range_km": 100.0}
+
+
+def test_upsert_updates_by_name_and_inserts_new(store):
+    before = store.signature("uav_models.json")
+    existing = storage.frame_to_records(store.load("uav_models.json"))[0]
+    store.upsert("uav_models.json", [
+        dict(existing, range_km=1.0),
+        {"id": "uav-9", "name": "X-9", "purpose": ["侦察"]},
+    ])
+    assert store.signature("uav_models.json") == before + 1
+
+    df = store.load("uav_models.json").set_index("name")
+    assert len(df) == 3
+    assert df.loc[existing["name"], "range_km"] == 1.0
+    assert df.loc[existing["name"], "custom_params"] == existing["custom_params"]
+    assert df.loc["X-9", "purpose"] == ["侦察"]
+
+
+def test_update_unknown_name_raises(store):
+    with pytest.raises(KeyError):
+        store.update("uav_models.json", "missing", {"name": "missing"})
+
+
+def test_load_projects_columns(store):
+    df = store.load("uav_models.json", columns=["name", "range_km", "not_a_column"])
+    assert list(df.columns) == ["name", "range_km"]
+
+
+def test_export_then_import_round_trips(store, tmp_path):
+    originals = {f: _read_json(tmp_path / f) for f in storage.TABLES}
+    for filename in storage.TABLES:
+        store.export_json(filename)
+
+    exported = _read_json(tmp_path / "uav_models.json")
+    for record, original in zip(exported, originals["uav_models.json"]):
+        _assert_contains(record, original)
+    assert _read_json(tmp_path / "custom_params.json") == originals["custom_params.json"]
+
+    # 清空后再从导出的 JSON 导入，内容不变
+    snapshot = {f: storage.frame_to_records(store.load(f)) for f in ("uav_models.json", "subsystems.json")}
+    store.save("uav_models.json", store.load("uav_models.json").iloc[0:0])
+    store.save_custom_params([])
+    for filename in storage.TABLES:
+        store.import_json(filename)
+    for filename, records in snapshot.items():
+        assert storage.frame_to_records(store.load(filename)) == records
+    assert store.load_custom_params() == originals["custom_params.json"]
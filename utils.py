@@ -1,121 +1,507 @@
+import atexit
+import copy
+import functools
+import hashlib
+import io
 import json
+import multiprocessing
 import os
+import re
+import threading
+import time
+import traceback
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from openpyxl import load_workbook
+
+import search
+import specs
+import storage
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
 CASES_DIR = os.path.join(DATA_DIR, "cases")
 
-def load_data(filename):
-    """Load JSON data as a pandas DataFrame."""
-    filepath = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(filepath):
-        return pd.DataFrame()
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    return pd.DataFrame(data)
-
-def save_data(filename, df):
-    """Save DataFrame to JSON file."""
-    filepath = os.path.join(DATA_DIR, filename)
-
-    # Convert DataFrame back to list of dicts
-    data = df.to_dict(orient="records")
-
-    # 清理NaN值，转换为None
-    def clean_nan(obj):
-        if isinstance(obj, dict):
-            return {k: clean_nan(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [clean_nan(item) for item in obj]
-        elif isinstance(obj, float) and (pd.isna(obj) or obj != obj):  # NaN检查
-            return None
+# 存储后端，可通过环境变量 UAV_STORAGE_BACKEND 选择 (json / journal / sqlite / parquet)
+STORAGE_BACKEND = os.environ.get("UAV_STORAGE_BACKEND", "json").lower()
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Return the process-wide storage backend selected by STORAGE_BACKEND."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if STORAGE_BACKEND not in storage.BACKENDS:
+                    raise ValueError(f"未知的存储后端: {STORAGE_BACKEND}")
+                _store = storage.BACKENDS[STORAGE_BACKEND](DATA_DIR)
+    return _store
+
+# 进程级缓存：所有 Streamlit 会话共享，按数据文件名 + 后端给出的版本签名校验
+_cache_lock = threading.Lock()
+_data_cache = {}
+
+def _cached_load(key, signature, loader):
+    """Return loader(), reusing the previous result while the signature is unchanged."""
+    with _cache_lock:
+        entry = _data_cache.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+    value = loader()
+    with _cache_lock:
+        _data_cache[key] = (signature, value)
+    return value
+
+def invalidate_cache(filename=None):
+    """Drop cached data for one data file, or for all files."""
+    with _cache_lock:
+        if filename is None:
+            _data_cache.clear()
         else:
-            return obj
+            for key in [k for k in _data_cache if k[0] == filename]:
+                del _data_cache[key]
 
-    data = clean_nan(data)
+def load_data(filename, columns=None):
+    """Load a dataset as a pandas DataFrame, optionally only the given columns.
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    The parsed frame is shared by every session until the underlying data
+    changes; callers get their own copy so the cached frame is never mutated.
+    """
+    store = get_store()
+    key = (filename, tuple(columns) if columns is not None else None)
+    frame = _cached_load(key, store.signature(filename), lambda: store.load(filename, columns))
+    return frame.copy()
 
-def import_excel_data(uploaded_file):
-    """Process uploaded Excel file and update JSON databases."""
+def save_data(filename, df):
+    """Replace a whole dataset with the given DataFrame."""
+    get_store().save(filename, df)
+    invalidate_cache(filename)
+    _reindex_dataset(filename)
+
+def insert_record(filename, record):
+    """Append a single record to a dataset."""
+    get_store().insert(filename, record)
+    invalidate_cache(filename)
+    _index_records(filename, [record])
+
+def update_record(filename, name, record):
+    """Replace the record with the given name."""
+    get_store().update(filename, name, record)
+    invalidate_cache(filename)
+    _index_records(filename, [record], replaced=name)
+
+def delete_record(filename, name):
+    """Delete every record with the given name."""
+    get_store().delete(filename, name)
+    invalidate_cache(filename)
+    _index_records(filename, [], replaced=name)
+
+def upsert_records(filename, records):
+    """Replace records by name, or append them if the name is new, in one write."""
+    get_store().upsert(filename, records)
+    invalidate_cache(filename)
+    _index_records(filename, records)
+
+def load_spec_index(filename="subsystems.json"):
+    """Return a specs.SpecIndex over the dataset, rebuilt only when the data changes.
+
+    Row positions refer to the frame returned by load_data(filename).
+    """
+    store = get_store()
+    return _cached_load((filename, "spec_index"), store.signature(filename),
+                        lambda: specs.SpecIndex.from_frame(load_data(filename)))
+
+# ID 分配：毫秒时间戳为基数，进程内单调递增，批量导入按块分配
+# 首次分配前以已存储的最大编号为下限，重启或时钟回拨后也不会重复
+_id_lock = threading.Lock()
+_last_id = None
+
+def _largest_stored_id(prefix, filename="uav_models.json"):
+    df = load_data(filename, columns=["id"])
+    if "id" not in df.columns:
+        return 0
+    suffixes = df["id"].dropna().astype(str).str.extract(rf"^{re.escape(prefix)}-(\d+)$")[0].dropna()
+    return int(suffixes.astype("int64").max()) if not suffixes.empty else 0
+
+def allocate_ids(count=1, prefix="uav"):
+    """Return a block of count unique, increasing IDs like "uav-1768356460123".
+
+    IDs start above both the current time in milliseconds and the largest
+    "<prefix>-<n>" id already stored, which is read on first use.
+    """
+    global _last_id
+    with _id_lock:
+        if _last_id is None:
+            _last_id = _largest_stored_id(prefix)
+        start = max(_last_id + 1, int(datetime.now().timestamp() * 1000))
+        _last_id = start + count - 1
+    return [f"{prefix}-{n}" for n in range(start, start + count)]
+
+def repair_duplicate_ids(filename="uav_models.json", prefix="uav"):
+    """Give every record whose id is missing or repeats an earlier one a fresh id.
+
+    Returns the number of records that were re-keyed.
+    """
+    df = load_data(filename)
+    if df.empty:
+        return 0
+    ids = df["id"] if "id" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    broken = (ids.isna() | ids.duplicated(keep="first")).to_numpy()
+    if not broken.any():
+        return 0
+    column = ids.to_numpy(dtype=object, copy=True)
+    column[broken] = allocate_ids(int(broken.sum()), prefix)
+    df["id"] = column
+    save_data(filename, df)
+    return int(broken.sum())
+
+# 流式导入时每批读取的行数
+IMPORT_CHUNK_ROWS = 5000
+
+def iter_sheet_chunks(worksheet, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Yield DataFrames of at most chunk_rows rows from a read-only worksheet.
+
+    The first row is the header; columns without a header and fully empty
+    rows are skipped, so only one chunk of the sheet is in memory at a time.
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    positions = [i for i, h in enumerate(header) if h is not None and str(h).strip()]
+    columns = [str(header[i]).strip() for i in positions]
+
+    buffer = []
+    for row in rows:
+        values = [row[i] if i < len(row) else None for i in positions]
+        if all(v is None for v in values):
+            continue
+        buffer.append(values)
+        if len(buffer) >= chunk_rows:
+            yield pd.DataFrame(buffer, columns=columns)
+            buffer = []
+    if buffer:
+        yield pd.DataFrame(buffer, columns=columns)
+
+def _normalize_purpose(chunk):
+    """Split comma separated purpose strings into lists."""
+    if "purpose" in chunk.columns:
+        chunk["purpose"] = chunk["purpose"].map(
+            lambda v: [p.strip() for p in v.split(",")] if isinstance(v, str) else v
+        )
+    return chunk
+
+def _normalize_specs(chunk):
+    """Store unit-normalized numbers parsed from key_specs next to the raw text.
+
+    Rows without key_specs get no spec_values, so an upsert keeps the stored
+    pair instead of pairing the old key_specs with empty values.
+    """
+    if "key_specs" in chunk.columns:
+        chunk[specs.SPEC_VALUES_FIELD] = chunk["key_specs"].map(
+            lambda v: specs.normalize_specs(v) if isinstance(v, (str, dict)) else None
+        )
+    return chunk
+
+# 记录内容摘要字段：导入时据此跳过未改动的行
+CONTENT_HASH_FIELD = "content_hash"
+
+def _normalize_for_hash(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list):
+        return [_normalize_for_hash(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _normalize_for_hash(v) for k, v in value.items()}
+    return str(value)
+
+def record_digest(record):
+    """Return a SHA-1 digest of a record's non-empty fields, ignoring key order and number types."""
+    fields = {str(k): _normalize_for_hash(v) for k, v in record.items()
+              if v is not None and k != CONTENT_HASH_FIELD}
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def upsert_by_name(current, incoming, on_insert=None, meta_columns=()):
+    """Merge incoming rows into current by "name" using column-wise pandas operations.
+
+    Non-null incoming values overwrite, everything else is kept; rows whose
+    name is new are appended after passing through on_insert (if given).
+    Several incoming rows with the same name are folded in order first.
+    Returns (merged, counts) with inserted/updated/unchanged row counts;
+    changes to meta_columns alone do not count as an update.
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if "name" not in incoming.columns:
+        return current, counts
+    incoming = incoming[incoming["name"].notna()]
+    if incoming.empty:
+        return current, counts
+    # 同名多行：后出现的非空值覆盖先出现的
+    incoming = incoming.groupby("name", sort=False).last().reset_index()
+
+    current = current.reset_index(drop=True)
+    if "name" not in current.columns:
+        current = current.assign(name=pd.Series(dtype=object))
+    columns = list(current.columns) + [c for c in incoming.columns if c not in current.columns]
+    current = current.reindex(columns=columns)
+
+    # 每个名称对应其在现有数据中的首行位置
+    first_rows = pd.Series(current.index, index=current["name"])
+    first_rows = first_rows[~first_rows.index.duplicated()]
+    positions = incoming["name"].map(first_rows)
+    matched = positions.notna().to_numpy()
+
+    updates = incoming[matched]
+    rows = positions[matched].astype(int).to_numpy()
+    changed = np.zeros(len(updates), dtype=bool)
+    for col in updates.columns:
+        if col == "name":
+            continue
+        take = np.flatnonzero(updates[col].notna().to_numpy())
+        if len(take) == 0:
+            continue
+        new_values = updates[col].to_numpy(dtype=object)[take]
+        column = current[col].to_numpy(dtype=object, copy=True)
+        diff = np.not_equal(new_values, column[rows[take]]).astype(bool)
+        if not diff.any():
+            continue
+        if col not in meta_columns:
+            changed[take[diff]] = True
+        column[rows[take]] = new_values
+        current[col] = pd.Series(column, index=current.index).infer_objects()
+
+    inserted = incoming[~matched]
+    if on_insert is not None and not inserted.empty:
+        inserted = on_insert(inserted.copy())
+    merged = pd.concat([current, inserted], ignore_index=True) if not inserted.empty else current
+
+    counts["inserted"] = len(inserted)
+    counts["updated"] = int(changed.sum())
+    counts["unchanged"] = len(updates) - counts["updated"]
+    return merged, counts
+
+def _import_chunks(chunks, filename, on_insert=None, on_rows=None):
+    """Merge a stream of DataFrame chunks into a dataset and return the summed upsert counts.
+
+    Rows sharing a name within a chunk are first folded with the
+    upsert_by_name rule (later non-null values win), so each name has one
+    digest. Names whose digest matches the one stored from the previous
+    import are skipped before merging, and only the records that did change
+    are written back.
+    """
+    merged = load_data(filename)
+    known = {}
+    if not merged.empty and {"name", CONTENT_HASH_FIELD} <= set(merged.columns):
+        known = dict(zip(merged["name"], merged[CONTENT_HASH_FIELD]))
+
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+    touched = []
+    for chunk in chunks:
+        if on_rows is not None:
+            on_rows(len(chunk))
+        chunk = _normalize_specs(_normalize_purpose(chunk))
+        if "name" not in chunk.columns:
+            continue
+        chunk = chunk[chunk["name"].notna()]
+        if chunk["name"].duplicated().any():
+            chunk = chunk.groupby("name", sort=False).last().reset_index()
+        records = storage.frame_to_records(chunk)
+        chunk = chunk.assign(**{CONTENT_HASH_FIELD: [record_digest(r) for r in records]})
+
+        fresh = (chunk[CONTENT_HASH_FIELD] != chunk["name"].map(known)).to_numpy()
+        totals["unchanged"] += int((~fresh).sum())
+        if not fresh.any():
+            continue
+        chunk = chunk[fresh]
+        known.update(zip(chunk["name"], chunk[CONTENT_HASH_FIELD]))
+        touched.extend(chunk["name"])
+
+        merged, counts = upsert_by_name(merged, chunk, on_insert, meta_columns=(CONTENT_HASH_FIELD,))
+        for k, v in counts.items():
+            totals[k] += v
+
+    if touched:
+        rows = merged.drop_duplicates(subset=["name"])
+        rows = rows[rows["name"].isin(set(touched))]
+        upsert_records(filename, storage.frame_to_records(rows))
+    return totals
+
+def _assign_missing_ids(rows):
+    """Give newly imported UAV rows without an id a freshly allocated one."""
+    ids = rows["id"] if "id" in rows.columns else pd.Series(None, index=rows.index, dtype=object)
+    missing = ids.isna().to_numpy()
+    column = ids.to_numpy(dtype=object, copy=True)
+    column[missing] = allocate_ids(int(missing.sum()))
+    rows["id"] = column
+    return rows
+
+def _import_summary(label, counts):
+    changed = counts["inserted"] + counts["updated"]
+    return (f"{label}：{changed} 条变更 / {counts['unchanged']} 条未变"
+            f"（新增 {counts['inserted']}，更新 {counts['updated']}）")
+
+def import_excel_data(uploaded_file, chunk_rows=IMPORT_CHUNK_ROWS, progress=None):
+    """Process uploaded Excel file and update JSON databases.
+
+    Sheets are streamed with openpyxl in read-only mode and merged chunk by
+    chunk with upsert_by_name, so memory stays bounded by chunk_rows rather
+    than the sheet size. progress(processed, total) is called after every
+    chunk when given; total is None if the workbook does not record its size.
+    """
     try:
-        xls = pd.ExcelFile(uploaded_file)
-
-        # 1. Process UAVs
-        if "UAVs" in xls.sheet_names:
-            new_df = pd.read_excel(xls, "UAVs")
-            current_df = load_data("uav_models.json")
-
-            # Ensure columns exist in current data for consistency
-            if not new_df.empty:
-                # Generate IDs for new items if not present
-                if "id" not in new_df.columns:
-                    new_df["id"] = new_df.apply(lambda x: f"uav-{int(datetime.now().timestamp())}-{x.name}", axis=1)
-
-                # Merge: Update existing (by name) and Append new
-                if not current_df.empty:
-                    # Create a dictionary of existing items for quick lookup
-                    existing_dict = current_df.set_index("name").to_dict(orient="index")
-
-                    for _, row in new_df.iterrows():
-                        name = row["name"]
-                        if pd.isna(name): continue
-
-                        # Clean row data
-                        row_data = row.dropna().to_dict()
-                        if "purpose" in row_data and isinstance(row_data["purpose"], str):
-                             row_data["purpose"] = [p.strip() for p in row_data["purpose"].split(",")]
-
-                        if name in existing_dict:
-                            # Update existing
-                            existing_dict[name].update(row_data)
-                        else:
-                            # Add new
-                            new_item = row.to_dict()
-                            if "purpose" in new_item and isinstance(new_item["purpose"], str):
-                                new_item["purpose"] = [p.strip() for p in new_item["purpose"].split(",")]
-                            new_item["id"] = f"uav-{int(datetime.now().timestamp())}"
-                            # Add to current_df is complex here, simpler to rebuild list
-                            existing_dict[name] = new_item
-
-                    # Reconstruct DataFrame
-                    final_uav_data = pd.DataFrame.from_dict(existing_dict, orient="index").reset_index(drop=True)
-                else:
-                    final_uav_data = new_df
-
-                save_data("uav_models.json", final_uav_data)
-
-        # 2. Process Subsystems
-        if "Subsystems" in xls.sheet_names:
-            new_df = pd.read_excel(xls, "Subsystems")
-            current_df = load_data("subsystems.json")
-
-            if not new_df.empty:
-                 # Logic similar to above, simplified for demo
-                combined_df = pd.concat([current_df, new_df]).drop_duplicates(subset=["name"], keep="last")
-                save_data("subsystems.json", combined_df)
-
-        return True, "导入成功！数据已更新。"
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        summary = []
+        try:
+            sheets = [name for name in ("UAVs", "Subsystems") if name in workbook.sheetnames]
+            sizes = [workbook[name].max_row for name in sheets]
+            total = sum(max(size - 1, 0) for size in sizes) if None not in sizes else None
+            processed = 0
+
+            def on_rows(count):
+                nonlocal processed
+                processed += count
+                if progress is not None:
+                    progress(processed, total)
+
+            # 1. Process UAVs
+            if "UAVs" in sheets:
+                counts = _import_chunks(iter_sheet_chunks(workbook["UAVs"], chunk_rows),
+                                        "uav_models.json", _assign_missing_ids, on_rows)
+                summary.append(_import_summary("机型", counts))
+
+            # 2. Process Subsystems
+            if "Subsystems" in sheets:
+                counts = _import_chunks(iter_sheet_chunks(workbook["Subsystems"], chunk_rows),
+                                        "subsystems.json", on_rows=on_rows)
+                summary.append(_import_summary("子系统", counts))
+        finally:
+            workbook.close()
+
+        return True, "导入成功！数据已更新。" + "；".join(summary)
     except Exception as e:
         return False, f"导入失败: {str(e)}"
 
-def get_image_path(image_url):
-    """Get appropriate image path, supporting both URLs and local files."""
-    if not image_url or pd.isna(image_url):
-        return None
+# 工作表 / 数据集名称 -> (数据文件, 新记录处理)
+IMPORT_DATASETS = {
+    "UAVs": ("uav_models.json", _assign_missing_ids),
+    "Subsystems": ("subsystems.json", None),
+}
+IMPORT_FORMATS = (".xlsx", ".csv", ".jsonl", ".parquet")
+
+def detect_dataset(filename, columns):
+    """Guess whether a single-table file holds UAVs or Subsystems.
+
+    A "subsystem"/"子系统" or "uav"/"机型" hint in the file name wins;
+    otherwise subsystem-only columns (category, key_specs) decide.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0].lower()
+    if "subsystem" in stem or "子系统" in stem:
+        return "Subsystems"
+    if "uav" in stem or "机型" in stem:
+        return "UAVs"
+    return "Subsystems" if {"category", "key_specs"} & set(columns) else "UAVs"
+
+def parse_data_file(filename, data):
+    """Parse one uploaded file into a list of (dataset, DataFrame) pairs.
+
+    Runs in a worker process when several files are imported at once, so it
+    only takes plain bytes and returns picklable frames.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    buffer = io.BytesIO(data)
+    if ext == ".xlsx":
+        workbook = load_workbook(buffer, read_only=True, data_only=True)
+        try:
+            frames = []
+            for sheet in IMPORT_DATASETS:
+                if sheet in workbook.sheetnames:
+                    chunks = list(iter_sheet_chunks(workbook[sheet]))
+                    if chunks:
+                        frames.append((sheet, pd.concat(chunks, ignore_index=True)))
+            return frames
+        finally:
+            workbook.close()
+    if ext == ".csv":
+        df = pd.read_csv(buffer, encoding="utf-8-sig")
+    elif ext == ".jsonl":
+        df = pd.read_json(buffer, lines=True, dtype=False)
+    elif ext == ".parquet":
+        df = pd.read_parquet(buffer)
+    else:
+        raise ValueError(f"不支持的文件格式: {ext}")
+    return [(detect_dataset(filename, df.columns), df)]
+
+def import_data_files(files, progress=None, max_workers=None, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Import several Excel/CSV/JSON Lines/Parquet files through the UAVs/Subsystems mapping.
+
+    files is a list of (filename, bytes). With more than one file they are
+    parsed in parallel in a process pool; the parsed tables are then merged
+    per dataset with the same rules as import_excel_data. A single .xlsx
+    keeps the streaming import path.
+    """
+    if len(files) == 1 and files[0][0].lower().endswith(".xlsx"):
+        return import_excel_data(io.BytesIO(files[0][1]), chunk_rows, progress)
 
-    image_url = str(image_url).strip()
+    try:
+        if len(files) > 1:
+            # spawn：在 Streamlit 的工作线程中 fork 不安全
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+                parsed = list(pool.map(parse_data_file, *zip(*files)))
+        else:
+            parsed = [parse_data_file(*files[0])]
+
+        tables = {sheet: [] for sheet in IMPORT_DATASETS}
+        for frames in parsed:
+            for sheet, df in frames:
+                tables[sheet].append(df)
+        total = sum(len(df) for frames in tables.values() for df in frames)
+        processed = 0
+
+        def on_rows(count):
+            nonlocal processed
+            processed += count
+            if progress is not None:
+                progress(processed, total)
+
+        summary = []
+        for sheet, frames in tables.items():
+            if not frames:
+                continue
+            filename, on_insert = IMPORT_DATASETS[sheet]
+            chunks = (df.iloc[start:start + chunk_rows]
+                      for df in frames for start in range(0, len(df), chunk_rows))
+            counts = _import_chunks(chunks, filename, on_insert, on_rows)
+            summary.append(_import_summary("机型" if sheet == "UAVs" else "子系统", counts))
+
+        return True, "导入成功！数据已更新。" + "；".join(summary)
+    except Exception as e:
+        return False, f"导入失败: {str(e)}"
 
-    # If it's a URL, return as is
-    if image_url.startswith("http"):
-        return image_url
+# 图片路径解析缓存：LRU 上限；找不到的图片也缓存，但只保留 IMAGE_MISS_TTL 秒
+IMAGE_PATH_CACHE_SIZE = 1024
+IMAGE_MISS_TTL = 30
+_image_path_lock = threading.Lock()
+_image_paths = OrderedDict()
+
+def _resolve_image_path(image_url):
+    # Uploaded images resolve through the asset manifest
+    entry = load_asset_manifest().get(image_url)
+    if entry is not None:
+        path = os.path.join(BLOB_DIR, entry["blob"])
+        if os.path.exists(path):
+            return path
 
-    # Handle local file paths
     # Try relative paths: assets/, data/, or absolute path
     possible_paths = [
         os.path.join(ASSETS_DIR, image_url),
@@ -130,29 +516,196 @@ def get_image_path(image_url):
 
     return None
 
+def get_image_path(image_url):
+    """Get appropriate image path, supporting both URLs and local files."""
+    if not image_url or pd.isna(image_url):
+        return None
+
+    image_url = str(image_url).strip()
+
+    # If it's a URL, return as is
+    if image_url.startswith("http"):
+        return image_url
+
+    # Handle local file paths
+    now = time.monotonic()
+    with _image_path_lock:
+        entry = _image_paths.get(image_url)
+        if entry is not None and (entry[0] is not None or entry[1] > now):
+            _image_paths.move_to_end(image_url)
+            return entry[0]
+
+    path = _resolve_image_path(image_url)
+    with _image_path_lock:
+        _image_paths[image_url] = (path, now + IMAGE_MISS_TTL)
+        _image_paths.move_to_end(image_url)
+        while len(_image_paths) > IMAGE_PATH_CACHE_SIZE:
+            _image_paths.popitem(last=False)
+    return path
+
+def invalidate_image_paths(image_url=None):
+    """Forget the resolved path of one image name, or of all images."""
+    with _image_path_lock:
+        if image_url is None:
+            _image_paths.clear()
+        else:
+            _image_paths.pop(str(image_url).strip(), None)
+
+# 上传图片按内容哈希存储：assets/blobs/<sha256><ext>，manifest 记录 图片名 -> blob
+BLOB_DIR = os.path.join(ASSETS_DIR, "blobs")
+ASSET_MANIFEST = os.path.join(ASSETS_DIR, "manifest.json")
+ASSET_GC_GRACE = 3600
+_manifest_lock = threading.Lock()
+
+def load_asset_manifest():
+    """Return {image name: {"blob", "size", "created_at"}} for uploaded images."""
+    def loader():
+        if not os.path.exists(ASSET_MANIFEST):
+            return {}
+        with open(ASSET_MANIFEST, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return _cached_load(("manifest.json", None), storage.file_signature(ASSET_MANIFEST), loader)
+
+def _write_asset_manifest(manifest):
+    tmp_path = ASSET_MANIFEST + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(storage.dumps_json(manifest, indent=2))
+    os.replace(tmp_path, ASSET_MANIFEST)
+    invalidate_cache("manifest.json")
+
+def save_asset(uploaded_file):
+    """Store an uploaded image by content hash and return the name to store as image_url.
+
+    Identical bytes are written once. A name already bound to different
+    content gets a hash-suffixed name instead, so an image name never
+    changes meaning and can be cached indefinitely.
+    """
+    data = bytes(uploaded_file.getbuffer())
+    digest = hashlib.sha256(data).hexdigest()
+    stem, ext = os.path.splitext(os.path.basename(uploaded_file.name))
+    blob = digest + ext.lower()
+
+    with _manifest_lock:
+        manifest = dict(load_asset_manifest())
+        name = f"{stem}{ext}"
+        entry = manifest.get(name)
+        if entry is not None and entry["blob"] == blob:
+            return name
+        if entry is not None or os.path.exists(os.path.join(ASSETS_DIR, name)):
+            name = f"{stem}-{digest[:8]}{ext}"
+
+        blob_path = os.path.join(BLOB_DIR, blob)
+        if not os.path.exists(blob_path):
+            os.makedirs(BLOB_DIR, exist_ok=True)
+            with open(blob_path + ".tmp", 'wb') as f:
+                f.write(data)
+            os.replace(blob_path + ".tmp", blob_path)
+
+        if name not in manifest:
+            manifest[name] = {"blob": blob, "size": len(data), "created_at": datetime.now().isoformat()}
+            _write_asset_manifest(manifest)
+    invalidate_image_paths(name)
+    return name
+
+def gc_assets():
+    """Drop manifest entries no UAV or subsystem references and delete unreferenced blobs.
+
+    Entries younger than ASSET_GC_GRACE seconds are kept. Returns (removed entries, removed blobs).
+    """
+    referenced = set()
+    for filename in ("uav_models.json", "subsystems.json"):
+        df = load_data(filename, columns=["image_url"])
+        if "image_url" in df.columns:
+            referenced.update(str(v).strip() for v in df["image_url"].dropna())
+
+    with _manifest_lock:
+        manifest = load_asset_manifest()
+        # 刚上传、尚未随机型保存的图片保留 ASSET_GC_GRACE 秒
+        cutoff = (datetime.now() - timedelta(seconds=ASSET_GC_GRACE)).isoformat()
+        kept = {name: entry for name, entry in manifest.items()
+                if name in referenced or entry.get("created_at", "") > cutoff}
+        if len(kept) != len(manifest):
+            _write_asset_manifest(kept)
+
+        live = {entry["blob"] for entry in kept.values()}
+        removed_blobs = 0
+        if os.path.isdir(BLOB_DIR):
+            for blob in os.listdir(BLOB_DIR):
+                if blob not in live:
+                    os.remove(os.path.join(BLOB_DIR, blob))
+                    removed_blobs += 1
+    invalidate_image_paths()
+    return len(manifest) - len(kept), removed_blobs
+
+CASE_EXCERPT_CHARS = 120
+
+def _case_summary(filename):
+    """Return title, size, mtime and a short excerpt read from the head of one case file."""
+    filepath = os.path.join(CASES_DIR, filename)
+    stat = os.stat(filepath)
+    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+        head = f.read(4096)
+
+    title, body = filename[:-3], []
+    for line in head.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('# ') and title == filename[:-3] and not body:
+            title = line[2:].strip() or title
+        elif not line.startswith(('#', '![', '```', '|', '---')):
+            # 去掉列表符号与强调标记
+            line = re.sub(r"^([-*+]|\d+\.)\s+", "", line)
+            body.append(re.sub(r"[*_`>]+", "", line).strip())
+        if sum(len(b) for b in body) >= CASE_EXCERPT_CHARS:
+            break
+    excerpt = " ".join(body)
+    if len(excerpt) > CASE_EXCERPT_CHARS:
+        excerpt = excerpt[:CASE_EXCERPT_CHARS] + "…"
+
+    return {
+        'name': filename[:-3],  # Remove .md extension
+        'filepath': filepath,
+        'filename': filename,
+        'title': title,
+        'size': stat.st_size,
+        'mtime': datetime.fromtimestamp(stat.st_mtime),
+        'excerpt': excerpt,
+    }
+
 def get_case_files():
-    """Get all markdown case files from the cases directory."""
+    """Get all markdown case files from the cases directory.
+
+    The listing (with title, size, mtime and excerpt) is cached until the
+    directory's mtime changes; save_case_file replaces files atomically so
+    edits change it too.
+    """
     if not os.path.exists(CASES_DIR):
         os.makedirs(CASES_DIR, exist_ok=True)
         return []
 
-    case_files = []
-    for filename in os.listdir(CASES_DIR):
-        if filename.endswith('.md'):
-            filepath = os.path.join(CASES_DIR, filename)
-            case_files.append({
-                'name': filename[:-3],  # Remove .md extension
-                'filepath': filepath,
-                'filename': filename
-            })
+    def loader():
+        case_files = [_case_summary(filename) for filename in os.listdir(CASES_DIR) if filename.endswith('.md')]
+        return sorted(case_files, key=lambda x: x['name'])
+
+    cases = _cached_load(("cases", None), storage.file_signature(CASES_DIR), loader)
+    return [dict(case) for case in cases]
 
-    return sorted(case_files, key=lambda x: x['name'])
+def read_case_file(filename):
+    """Return the Markdown content of one case file, or None if it does not exist."""
+    filepath = os.path.join(CASES_DIR, filename)
+    if not os.path.exists(filepath):
+        return None
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return f.read()
 
 def delete_case_file(filename):
     """Delete a case file by filename."""
     filepath = os.path.join(CASES_DIR, filename)
     if os.path.exists(filepath):
         os.remove(filepath)
+        invalidate_cache("cases")
+        _index_case(filename, None)
         return True
     return False
 
@@ -166,26 +719,133 @@ def save_case_file(filename, content):
         filename += '.md'
 
     filepath = os.path.join(CASES_DIR, filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         f.write(content)
+    os.replace(tmp_path, filepath)
+    invalidate_cache("cases")
+    _index_case(filename, content)
     return filepath
 
+# 全文检索：机型、子系统与案例共用一个持久化倒排索引，写入数据时增量更新
+SEARCH_INDEX_PATH = os.path.join(os.path.dirname(__file__), "cache", "search_index.json")
+SEARCH_KINDS = {"uav_models.json": "model", "subsystems.json": "subsystem"}
+_search_lock = threading.Lock()
+_search_index = None
+
+def _join_text(*values):
+    parts = []
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            parts.extend(str(v) for v in value if v is not None)
+        elif isinstance(value, dict):
+            parts.extend(f"{k} {v}" for k, v in value.items())
+        elif value is not None and not (isinstance(value, float) and np.isnan(value)):
+            parts.append(str(value))
+    return "\n".join(parts)
+
+def _search_document(kind, record):
+    """Return (title, text) indexed for a model or subsystem record."""
+    name = str(record.get("name"))
+    if kind == "model":
+        text = _join_text(name, record.get("manufacturer"), record.get("type"),
+                          record.get("purpose"), record.get("description"))
+    else:
+        text = _join_text(name, record.get("manufacturer"), record.get("category"),
+                          record.get("description"), specs.parse_key_specs(record.get("key_specs")))
+    return name, text
+
+def _dataset_documents(filename):
+    kind = SEARCH_KINDS[filename]
+    return {str(r["name"]): _search_document(kind, r)
+            for r in storage.frame_to_records(load_data(filename)) if r.get("name") is not None}
+
+def _case_documents():
+    documents = {}
+    for case in get_case_files():
+        documents[case["filename"]] = (case["name"], case["name"] + "\n" + (read_case_file(case["filename"]) or ""))
+    return documents
+
+def get_search_index():
+    """Return the process-wide search.SearchIndex, brought up to date on first use."""
+    global _search_index
+    with _search_lock:
+        if _search_index is None:
+            index = search.SearchIndex(SEARCH_INDEX_PATH)
+            changed = sum(index.sync(kind, _dataset_documents(filename)) for filename, kind in SEARCH_KINDS.items())
+            changed += index.sync("case", _case_documents())
+            if changed:
+                index.save_later()
+            # 进程退出前写入尚未落盘的更新；未写入的部分下次启动时由 sync 补齐
+            atexit.register(index.flush)
+            _search_index = index
+        return _search_index
+
+def _index_safely(update):
+    """Run a search-index hook so that an indexing failure never fails the data write before it.
+
+    On failure the in-memory index is dropped; the next search reloads it
+    and re-syncs it with the data.
+    """
+    @functools.wraps(update)
+    def wrapper(*args, **kwargs):
+        global _search_index
+        try:
+            update(*args, **kwargs)
+        except Exception:
+            traceback.print_exc()
+            with _search_lock:
+                _search_index = None
+    return wrapper
+
+@_index_safely
+def _index_records(filename, records, replaced=None):
+    kind = SEARCH_KINDS.get(filename)
+    if kind is None:
+        return
+    index = get_search_index()
+    changed = False
+    if replaced is not None and all(str(r.get("name")) != str(replaced) for r in records):
+        changed = index.remove(kind, str(replaced))
+    for record in records:
+        if record.get("name") is not None:
+            title, text = _search_document(kind, record)
+            changed |= index.update(kind, title, title, text)
+    if changed:
+        index.save_later()
+
+@_index_safely
+def _reindex_dataset(filename):
+    if filename in SEARCH_KINDS:
+        index = get_search_index()
+        if index.sync(SEARCH_KINDS[filename], _dataset_documents(filename)):
+            index.save_later()
+
+@_index_safely
+def _index_case(filename, content):
+    index = get_search_index()
+    if content is None:
+        changed = index.remove("case", filename)
+    else:
+        name = filename[:-3]
+        changed = index.update("case", filename, name, name + "\n" + content)
+    if changed:
+        index.save_later()
+
+def search_all(query, kinds=None, limit=20):
+    """Full-text search; returns ranked hits with kind ("model"/"subsystem"/"case"), ref, title and score."""
+    return get_search_index().search(query, kinds, limit)
+
 def load_custom_params():
     """Load custom parameters definition file."""
-    filepath = os.path.join(DATA_DIR, "custom_params.json")
-    if not os.path.exists(filepath):
-        return []
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    return data
+    store = get_store()
+    params = _cached_load(("custom_params.json", None), store.signature("custom_params.json"), store.load_custom_params)
+    return copy.deepcopy(params)
 
 def save_custom_params(params):
     """Save custom parameters definition."""
-    filepath = os.path.join(DATA_DIR, "custom_params.json")
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(params, f, indent=2, ensure_ascii=False)
+    get_store().save_custom_params(params)
+    invalidate_cache("custom_params.json")
 
 def add_custom_param(name, unit):
     """Add a new custom parameter."""